@@ -0,0 +1,127 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol, Tuple
+
+from ..models.schemas import (
+    ConversationState,
+    CONVERSATION_STATE_DECODER,
+    CONVERSATION_STATE_ENCODER
+)
+
+logger = logging.getLogger(__name__)
+
+# Idle conversations expire after an hour
+DEFAULT_TTL_SECONDS = 3600
+
+
+class ConversationStore(Protocol):
+    """Storage backend for conversation state"""
+
+    async def get(self, conversation_id: str) -> Optional[ConversationState]:
+        """Return the stored state, or None if unknown or expired"""
+        ...
+
+    async def put(
+        self,
+        conversation_id: str,
+        state: ConversationState,
+        ttl: int = DEFAULT_TTL_SECONDS
+    ) -> None:
+        """Store the state and (re)start its expiry timer"""
+        ...
+
+    async def aclose(self) -> None:
+        """Release any connections held by the store"""
+        ...
+
+
+class InMemoryConversationStore:
+    """Process-local conversation store with LRU eviction and TTL expiry"""
+
+    def __init__(self, max_conversations: int = 10000):
+        """
+        Initialize the in-memory store
+
+        Args:
+            max_conversations: Maximum number of conversations kept before
+                the least recently used one is evicted
+        """
+        self.max_conversations = max_conversations
+        self._states: "OrderedDict[str, Tuple[float, ConversationState]]" = OrderedDict()
+
+    async def get(self, conversation_id: str) -> Optional[ConversationState]:
+        entry = self._states.get(conversation_id)
+        if entry is None:
+            return None
+
+        expires_at, state = entry
+        if expires_at < time.monotonic():
+            del self._states[conversation_id]
+            return None
+
+        self._states.move_to_end(conversation_id)
+        return state
+
+    async def put(
+        self,
+        conversation_id: str,
+        state: ConversationState,
+        ttl: int = DEFAULT_TTL_SECONDS
+    ) -> None:
+        self._states[conversation_id] = (time.monotonic() + ttl, state)
+        self._states.move_to_end(conversation_id)
+
+        while len(self._states) > self.max_conversations:
+            evicted_id, _ = self._states.popitem(last=False)
+            logger.debug(f"Evicted conversation {evicted_id}")
+
+    async def aclose(self) -> None:
+        self._states.clear()
+
+
+class RedisConversationStore:
+    """
+    Redis-backed conversation store
+
+    State is shared by every worker process, so the API can run with more
+    than one uvicorn worker. Redis expires idle conversations via the key TTL.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", key_prefix: str = "conversation:"):
+        """
+        Initialize the Redis store
+
+        Args:
+            url: Redis connection URL
+            key_prefix: Prefix for conversation keys
+        """
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("RedisConversationStore requires the redis package: pip install redis") from e
+
+        self.key_prefix = key_prefix
+        self.redis = redis.from_url(url)
+        logger.info(f"Using Redis conversation store at {url}")
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.key_prefix}{conversation_id}"
+
+    async def get(self, conversation_id: str) -> Optional[ConversationState]:
+        raw = await self.redis.get(self._key(conversation_id))
+        if raw is None:
+            return None
+        return CONVERSATION_STATE_DECODER.decode(raw)
+
+    async def put(
+        self,
+        conversation_id: str,
+        state: ConversationState,
+        ttl: int = DEFAULT_TTL_SECONDS
+    ) -> None:
+        payload = CONVERSATION_STATE_ENCODER.encode(state)
+        await self.redis.set(self._key(conversation_id), payload, ex=ttl)
+
+    async def aclose(self) -> None:
+        await self.redis.aclose()
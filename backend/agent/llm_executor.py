@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger(__name__)
+
+
+class LLMExecutor:
+    """Sends each LLM request as its own API call"""
+
+    # Interactive requests hold one of the agent's bounded LLM slots
+    uses_llm_slots = True
+
+    def __init__(self, llm_client: Any, llm_provider: str):
+        """
+        Initialize the executor
+
+        Args:
+            llm_client: AsyncOpenAI or AsyncAnthropic client
+            llm_provider: LLM provider ("openai" or "anthropic")
+        """
+        self.llm_client = llm_client
+        self.llm_provider = llm_provider
+
+    async def create(self, request: Dict) -> Any:
+        """
+        Execute one chat/messages request
+
+        Args:
+            request: Keyword arguments for the provider's create call
+
+        Returns:
+            The provider's response object (ChatCompletion or Message)
+        """
+        if self.llm_provider == "openai":
+            return await self.llm_client.chat.completions.create(**request)
+        return await self.llm_client.messages.create(**request)
+
+
+class BatchLLMExecutor(LLMExecutor):
+    """
+    Collects requests over a short window and submits them as a single
+    provider batch job (OpenAI Batch API / Anthropic Message Batches)
+
+    Batch jobs cost about half as much as individual calls, but can take
+    minutes to hours to finish. Use this executor only for offline workloads
+    such as seeding, evals and regression runs, never for live chat.
+    """
+
+    # Batch jobs wait far longer than a live call; they must not hold the
+    # slots that interactive conversations queue on
+    uses_llm_slots = False
+
+    def __init__(
+        self,
+        llm_client: Any,
+        llm_provider: str,
+        max_batch: int = 500,
+        max_wait_ms: int = 50,
+        poll_interval: float = 10.0
+    ):
+        """
+        Initialize the batch executor
+
+        Args:
+            llm_client: AsyncOpenAI or AsyncAnthropic client
+            llm_provider: LLM provider ("openai" or "anthropic")
+            max_batch: Submit as soon as this many requests are pending
+            max_wait_ms: Otherwise submit this long after the first pending request
+            poll_interval: Seconds between batch status checks
+        """
+        super().__init__(llm_client, llm_provider)
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.poll_interval = poll_interval
+
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._jobs: Set[asyncio.Task] = set()
+
+    async def create(self, request: Dict) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Submit everything pending as one batch job"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        job = asyncio.create_task(self._run_batch(batch))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        """Run one batch job and resolve each request's future"""
+        futures = [future for _, future in batch]
+        try:
+            if self.llm_provider == "openai":
+                results = await self._run_openai_batch([request for request, _ in batch])
+            else:
+                results = await self._run_anthropic_batch([request for request, _ in batch])
+        except Exception as e:
+            logger.error(f"LLM batch of {len(batch)} requests failed: {str(e)}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for idx, future in enumerate(futures):
+            if future.done():
+                continue
+            result = results.get(idx)
+            if isinstance(result, Exception) or result is None:
+                future.set_exception(result or RuntimeError("Missing result in LLM batch output"))
+            else:
+                future.set_result(result)
+
+    async def _run_openai_batch(self, requests: List[Dict]) -> Dict[int, Any]:
+        lines = [
+            orjson.dumps({
+                "custom_id": str(idx),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request
+            })
+            for idx, request in enumerate(requests)
+        ]
+        input_file = await self.llm_client.files.create(
+            file=("chat_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        job = await self.llm_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted OpenAI batch {job.id} with {len(requests)} requests")
+
+        while job.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(self.poll_interval)
+            job = await self.llm_client.batches.retrieve(job.id)
+
+        if job.status != "completed" or not job.output_file_id:
+            raise RuntimeError(f"OpenAI batch {job.id} ended with status {job.status}")
+
+        output = await self.llm_client.files.content(job.output_file_id)
+        results: Dict[int, Any] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            idx = int(item["custom_id"])
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                results[idx] = RuntimeError(f"Batch request failed: {item.get('error') or response.get('body')}")
+            else:
+                results[idx] = ChatCompletion.model_validate(response["body"])
+        return results
+
+    async def _run_anthropic_batch(self, requests: List[Dict]) -> Dict[int, Any]:
+        job = await self.llm_client.messages.batches.create(
+            requests=[
+                {"custom_id": str(idx), "params": request}
+                for idx, request in enumerate(requests)
+            ]
+        )
+        logger.info(f"Submitted Anthropic message batch {job.id} with {len(requests)} requests")
+
+        while job.processing_status != "ended":
+            await asyncio.sleep(self.poll_interval)
+            job = await self.llm_client.messages.batches.retrieve(job.id)
+
+        results: Dict[int, Any] = {}
+        async for entry in await self.llm_client.messages.batches.results(job.id):
+            idx = int(entry.custom_id)
+            if entry.result.type == "succeeded":
+                results[idx] = entry.result.message
+            else:
+                results[idx] = RuntimeError(f"Batch request {entry.result.type}")
+        return results
@@ -1,3 +1,46 @@
+import string
+from typing import Any, Mapping, Tuple
+
+
+class PromptTemplate:
+    """
+    A str.format-style template parsed once, at import time
+
+    render() only joins the pre-split literal segments with the field values,
+    instead of reparsing the template text on every call the way str.format
+    does. Templates use plain {name} fields (no conversions or format specs).
+    """
+
+    def __init__(self, template: str):
+        """
+        Initialize the template
+
+        Args:
+            template: Template text with {name} fields
+        """
+        self.template = template
+        segments = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            if format_spec or conversion:
+                raise ValueError(f"Unsupported field in prompt template: {{{field_name}}}")
+            segments.append((literal, field_name))
+        self._segments: Tuple[Tuple[str, str], ...] = tuple(segments)
+
+    def render(self, **fields: Any) -> str:
+        """Fill in the template fields"""
+        return self.format_map(fields)
+
+    def format_map(self, fields: Mapping[str, Any]) -> str:
+        """Fill in the template fields from a mapping (raises KeyError for a missing field)"""
+        parts = []
+        for literal, field_name in self._segments:
+            parts.append(literal)
+            if field_name is not None:
+                value = fields[field_name]
+                parts.append(value if isinstance(value, str) else str(value))
+        return "".join(parts)
+
+
 SYSTEM_PROMPT = """You are a helpful and empathetic medical appointment scheduling assistant for HealthCare Plus Clinic. Your role is to help patients schedule appointments, answer questions about the clinic, and provide excellent customer service.
 
 ## Your Capabilities:
@@ -158,3 +201,42 @@ Respond to the patient with:
 - Be empathetic and helpful
 
 Never expose technical details to the patient."""
+
+# System prompt of background summarization requests, which run without
+# tools or the scheduling instructions
+HISTORY_SUMMARY_SYSTEM_PROMPT = """You summarize conversations between a medical clinic's scheduling assistant and a patient. Reply with the summary only."""
+
+HISTORY_SUMMARY_PROMPT = """Summarize the earlier part of this appointment scheduling conversation. Your summary will replace these messages, so keep every detail needed to continue helping the patient.
+
+Previous summary:
+{previous_summary}
+
+Conversation:
+{transcript}
+
+Include:
+- Reason for visit and appointment type
+- Date and time preferences
+- Slots offered and any slot the patient chose
+- Patient details collected so far (name, phone, email)
+- Bookings made, with confirmation codes
+- Open questions or next steps
+
+Write concise plain sentences, no more than 200 words."""
+
+# Sent directly (no LLM call) when a turn only looked up open slots. Unlike
+# SLOT_SUGGESTION_PROMPT, which instructs the LLM, this is patient-facing.
+SLOT_OPTIONS_MESSAGE = """Here are some available {appointment_type} times:
+
+{slots}
+
+Which of these works best for you? If none of them suit you, I can check other dates or times."""
+
+# Sent directly (no LLM call) when the agent is at capacity, following the
+# ERROR_HANDLING_PROMPT guidelines
+SYSTEM_BUSY_MESSAGE = """I'm sorry, I'm helping a lot of patients right now and couldn't get to your message. Could you please send it again in a moment? If it's urgent, you can also call the clinic directly and our staff will be happy to help."""
+
+
+# Pre-parsed versions of the templates the agent renders itself
+HISTORY_SUMMARY_TEMPLATE = PromptTemplate(HISTORY_SUMMARY_PROMPT)
+SLOT_OPTIONS_TEMPLATE = PromptTemplate(SLOT_OPTIONS_MESSAGE)
@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
 import logging
-import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Sequence, Tuple, Union
 from datetime import datetime
 import uuid
 import os
-from openai import OpenAI
-from anthropic import Anthropic
+from contextlib import asynccontextmanager
+import httpx
+import orjson
+from jsonschema import Draft202012Validator
+from openai import AsyncOpenAI
+from anthropic import AsyncAnthropic
 
 from .prompts import (
     SYSTEM_PROMPT,
+    SYSTEM_BUSY_MESSAGE,
+    HISTORY_SUMMARY_SYSTEM_PROMPT,
+    HISTORY_SUMMARY_TEMPLATE,
+    SLOT_OPTIONS_TEMPLATE,
     FAQ_PROMPT,
     SLOT_SUGGESTION_PROMPT,
     CONFIRMATION_PROMPT,
@@ -18,10 +27,343 @@ from ..rag.faq_rag import FAQRAG
 from ..tools.availability_tool import AvailabilityTool
 from ..tools.booking_tool import BookingTool
 from ..models.schemas import ConversationState, ChatMessage, PatientInfo
+from .conversation_store import ConversationStore, InMemoryConversationStore
+from .llm_executor import LLMExecutor, BatchLLMExecutor
+from ..cache import ResponseCache, SemanticResponseCache
 
 logger = logging.getLogger(__name__)
 
 
+class LLMBusyError(RuntimeError):
+    """Raised when too many LLM calls are already queued for a free slot"""
+
+
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+# Static prompt prefix, built once so the serialized request prefix is
+# byte-identical on every turn. Anthropic caches it through an explicit
+# cache_control breakpoint; OpenAI caches identical prefixes automatically.
+_OPENAI_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+_ANTHROPIC_SYSTEM = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": _EPHEMERAL_CACHE}
+]
+# With a history summary the breakpoint moves onto the summary block, which
+# keeps the request within Anthropic's four breakpoints
+_ANTHROPIC_SYSTEM_UNMARKED = {"type": "text", "text": SYSTEM_PROMPT}
+
+_SUMMARY_PREFIX = "[Prior conversation summary]: "
+
+# Tools whose results depend only on the clinic knowledge base, not on the
+# live calendar; a turn that used nothing else can be answered from cache
+_CACHEABLE_TOOLS = frozenset({"answer_faq"})
+
+# Tools whose results can be shown to the patient from a local template when
+# the model called them without any text of its own
+_SLOT_TOOLS = frozenset({"check_availability", "suggest_slots"})
+
+# Slots shown per check_availability call in a locally rendered reply
+_MAX_LOCAL_SLOTS = 5
+
+_APPOINTMENT_TYPE_NAMES = {
+    "consultation": "general consultation",
+    "followup": "follow-up",
+    "physical": "physical exam",
+    "specialist": "specialist consultation"
+}
+
+_APPOINTMENT_TYPES = ["consultation", "followup", "physical", "specialist"]
+_TIME_PREFERENCES = ["morning", "afternoon", "evening", "any"]
+
+# Tool specs as (name, description, JSON schema of the arguments). Both
+# provider formats are derived from this table once at import time.
+_TOOL_SPECS = (
+    (
+        "check_availability",
+        "Check available appointment slots for a specific date",
+        {
+            "type": "object",
+            "properties": {
+                "date": {
+                    "type": "string",
+                    "description": "Date in YYYY-MM-DD format"
+                },
+                "appointment_type": {
+                    "type": "string",
+                    "enum": _APPOINTMENT_TYPES,
+                    "description": "Type of appointment"
+                },
+                "time_preference": {
+                    "type": "string",
+                    "enum": _TIME_PREFERENCES,
+                    "description": "Preferred time of day"
+                }
+            },
+            "required": ["date", "appointment_type"]
+        }
+    ),
+    (
+        "suggest_slots",
+        "Get suggested time slots based on patient preferences",
+        {
+            "type": "object",
+            "properties": {
+                "preferred_date": {
+                    "type": "string",
+                    "description": "Preferred date in YYYY-MM-DD format (optional)"
+                },
+                "appointment_type": {
+                    "type": "string",
+                    "enum": _APPOINTMENT_TYPES,
+                    "description": "Type of appointment"
+                },
+                "time_preference": {
+                    "type": "string",
+                    "enum": _TIME_PREFERENCES,
+                    "description": "Preferred time of day"
+                },
+                "num_suggestions": {
+                    "type": "integer",
+                    "description": "Number of suggestions to return (default 5)"
+                }
+            },
+            "required": ["appointment_type"]
+        }
+    ),
+    (
+        "book_appointment",
+        "Book an appointment - ONLY use after patient explicitly confirms all details",
+        {
+            "type": "object",
+            "properties": {
+                "appointment_type": {
+                    "type": "string",
+                    "enum": _APPOINTMENT_TYPES
+                },
+                "date": {
+                    "type": "string",
+                    "description": "Date in YYYY-MM-DD format"
+                },
+                "start_time": {
+                    "type": "string",
+                    "description": "Start time in HH:MM format"
+                },
+                "patient_name": {
+                    "type": "string"
+                },
+                "patient_email": {
+                    "type": "string"
+                },
+                "patient_phone": {
+                    "type": "string"
+                },
+                "reason": {
+                    "type": "string"
+                }
+            },
+            "required": ["appointment_type", "date", "start_time", "patient_name", "patient_email", "patient_phone", "reason"]
+        }
+    ),
+    (
+        "answer_faq",
+        "Search the clinic knowledge base to answer questions about the clinic, policies, insurance, etc.",
+        {
+            "type": "object",
+            "properties": {
+                "question": {
+                    "type": "string",
+                    "description": "The patient's question"
+                }
+            },
+            "required": ["question"]
+        }
+    ),
+)
+
+_OPENAI_TOOLS = tuple(
+    {
+        "type": "function",
+        "function": {"name": name, "description": description, "parameters": parameters}
+    }
+    for name, description, parameters in _TOOL_SPECS
+)
+
+_ANTHROPIC_TOOLS = tuple(
+    {"name": name, "description": description, "input_schema": parameters}
+    for name, description, parameters in _TOOL_SPECS
+)
+# Breakpoint on the last tool caches the whole tool block
+_ANTHROPIC_TOOLS[-1]["cache_control"] = _EPHEMERAL_CACHE
+
+# Argument validators, compiled once per tool
+_TOOL_VALIDATORS = {
+    name: Draft202012Validator(parameters)
+    for name, _, parameters in _TOOL_SPECS
+}
+
+
+def _validate_tool_arguments(tool_name: str, arguments: Dict[str, Any]) -> Optional[Dict]:
+    """
+    Check tool arguments against the tool's JSON schema
+
+    Returns:
+        An error tool result the model can correct itself from, or None if
+        the arguments are valid
+    """
+    validator = _TOOL_VALIDATORS.get(tool_name)
+    if validator is None:
+        return {"success": False, "error": f"Unknown tool: {tool_name}"}
+
+    errors = sorted(validator.iter_errors(arguments), key=lambda error: list(error.absolute_path))
+    if not errors:
+        return None
+
+    details = "; ".join(
+        f"{'.'.join(str(part) for part in error.absolute_path) or 'arguments'}: {error.message}"
+        for error in errors
+    )
+    logger.warning(f"Invalid arguments for tool {tool_name}: {details}")
+    return {"success": False, "error": f"Invalid arguments for {tool_name}: {details}"}
+
+
+def _with_cache_breakpoints(messages: List[Dict]) -> List[Dict]:
+    """
+    Mark the last two user turns with Anthropic cache breakpoints
+
+    The newest turn writes the cache for the next request and the previous
+    one reads what the last request wrote, so each turn only pays for the
+    new suffix. The stored transcript is not modified; only the two marked
+    turns are copied.
+    """
+    marked = list(messages)
+    remaining = 2
+    for idx in range(len(marked) - 1, -1, -1):
+        if remaining == 0:
+            break
+        message = marked[idx]
+        if message["role"] != "user":
+            continue
+
+        content = message["content"]
+        if isinstance(content, str):
+            blocks = [{"type": "text", "text": content, "cache_control": _EPHEMERAL_CACHE}]
+        else:
+            blocks = content[:-1] + [{**content[-1], "cache_control": _EPHEMERAL_CACHE}]
+        marked[idx] = {"role": "user", "content": blocks}
+        remaining -= 1
+
+    return marked
+
+
+def _format_time(hhmm: str) -> str:
+    """Format an HH:MM time on the 12-hour clock, e.g. 14:30 -> 2:30 PM"""
+    hour, minute = (int(part) for part in hhmm.split(":"))
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def _render_slot_reply(response: Dict, tool_results: Sequence[Dict]) -> Optional[str]:
+    """
+    Render a slot-lookup tool turn as the patient-facing reply, without an LLM call
+
+    Only applies when the model said nothing itself and every call was a
+    successful slot lookup that found open slots; anything else (no slots,
+    errors, bookings, FAQs) needs the LLM to phrase the reply.
+
+    Returns:
+        The reply text, or None if the follow-up LLM call is needed
+    """
+    if response["content"].strip():
+        return None
+    if not all(tool_call["name"] in _SLOT_TOOLS for tool_call in response["tool_calls"]):
+        return None
+    if not all(result.get("success") for result in tool_results):
+        return None
+
+    lines = []
+    for tool_call, result in zip(response["tool_calls"], tool_results):
+        if tool_call["name"] == "suggest_slots":
+            slots = result["data"]
+        else:
+            day_name = datetime.strptime(result["data"]["date"], "%Y-%m-%d").strftime("%A")
+            slots = [
+                {"date": result["data"]["date"], "day_name": day_name, **slot}
+                for slot in result["data"]["available_slots"][:_MAX_LOCAL_SLOTS]
+            ]
+        if not slots:
+            # A lookup that found nothing needs explaining, even if another had slots
+            return None
+        for slot in slots:
+            date_text = datetime.strptime(slot["date"], "%Y-%m-%d").strftime("%B %d").replace(" 0", " ")
+            lines.append(f"- {slot['day_name']}, {date_text} at {_format_time(slot['start_time'])}")
+
+    appointment_type = response["tool_calls"][0]["arguments"].get("appointment_type", "")
+    return SLOT_OPTIONS_TEMPLATE.render(
+        appointment_type=_APPOINTMENT_TYPE_NAMES.get(appointment_type, "appointment"),
+        slots="\n".join(lines)
+    )
+
+
+def _update_phase(conversation: ConversationState, response: Dict, tool_results: Sequence[Dict]):
+    """Advance the conversation phase from the tools the model just used"""
+    called = {
+        tool_call["name"]
+        for tool_call, result in zip(response["tool_calls"], tool_results)
+        if result.get("success")
+    }
+    if "book_appointment" in called:
+        conversation.phase = "completed"
+    elif called & _SLOT_TOOLS:
+        conversation.phase = "slot_recommendation"
+    elif "answer_faq" in called:
+        conversation.phase = "faq"
+
+
+def _all_cacheable(response: Dict) -> bool:
+    """True if every tool the response called is cacheable (see _CACHEABLE_TOOLS)"""
+    return all(tool_call["name"] in _CACHEABLE_TOOLS for tool_call in response["tool_calls"])
+
+
+def _history_split(llm_messages: List[Dict], keep: int) -> int:
+    """
+    Find where to cut the transcript so at least `keep` messages remain
+
+    Returns:
+        Index of the last patient message that leaves `keep` or more
+        messages after the cut, or 0 if there is none
+    """
+    for idx in range(min(len(llm_messages) - keep, len(llm_messages) - 1), 0, -1):
+        message = llm_messages[idx]
+        if message["role"] == "user" and isinstance(message["content"], str):
+            return idx
+    return 0
+
+
+def _render_transcript(messages: List[Dict]) -> str:
+    """Render provider-formatted messages as plain text for summarizing"""
+    lines = []
+    for message in messages:
+        speaker = "Patient" if message["role"] == "user" else "Assistant"
+        content = message.get("content")
+
+        if message["role"] == "tool":
+            lines.append(f"Tool result: {content}")
+            continue
+        if isinstance(content, str):
+            lines.append(f"{speaker}: {content}")
+        elif content:
+            for block in content:
+                if block["type"] == "text" and block["text"]:
+                    lines.append(f"{speaker}: {block['text']}")
+                elif block["type"] == "tool_use":
+                    lines.append(f"Assistant called {block['name']} with {orjson.dumps(block['input']).decode()}")
+                elif block["type"] == "tool_result":
+                    lines.append(f"Tool result: {block['content']}")
+
+        for tool_call in message.get("tool_calls") or []:
+            lines.append(f"Assistant called {tool_call['function']['name']} with {tool_call['function']['arguments']}")
+
+    return "\n".join(lines)
+
+
 class SchedulingAgent:
     """Main conversational agent for appointment scheduling"""
 
@@ -32,7 +374,8 @@ class SchedulingAgent:
         api_key: Optional[str] = None,
         faq_rag: Optional[FAQRAG] = None,
         availability_tool: Optional[AvailabilityTool] = None,
-        booking_tool: Optional[BookingTool] = None
+        booking_tool: Optional[BookingTool] = None,
+        conversation_store: Optional[ConversationStore] = None
     ):
         """
         Initialize the scheduling agent
@@ -44,6 +387,8 @@ class SchedulingAgent:
             faq_rag: FAQ RAG system
             availability_tool: Availability checking tool
             booking_tool: Booking management tool
+            conversation_store: Conversation state storage (defaults to an
+                in-memory store, which only works with a single worker)
         """
         self.llm_provider = llm_provider.lower()
         self.llm_model = llm_model
@@ -51,43 +396,204 @@ class SchedulingAgent:
         self.availability_tool = availability_tool
         self.booking_tool = booking_tool
 
+        # One pooled HTTP/2 client for every outbound LLM call, so requests
+        # reuse warm connections instead of paying a TLS handshake each time
+        if self.llm_provider not in ("openai", "anthropic"):
+            raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        )
+
         # Initialize LLM client
         if self.llm_provider == "openai":
-            self.llm_client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
-        elif self.llm_provider == "anthropic":
-            self.llm_client = Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+            self.llm_client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), http_client=self._http)
         else:
-            raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+            self.llm_client = AsyncAnthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"), http_client=self._http)
+
+        # Interactive turns send one request per call; chat_bulk goes through
+        # the provider batch APIs instead
+        self.llm_executor = LLMExecutor(self.llm_client, self.llm_provider)
+        self.batch_executor = BatchLLMExecutor(self.llm_client, self.llm_provider)
 
         # Store active conversations
-        self.conversations: Dict[str, ConversationState] = {}
+        self.conversation_store = conversation_store or InMemoryConversationStore()
+
+        # FAQ contexts by normalized question, and final replies by rendered
+        # prompt for turns that only touched the FAQ. Reusing the context of
+        # an embedding-similar question is opt-in (SEMANTIC_CACHE_THRESHOLD).
+        semantic_threshold = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+        embedding_model = getattr(faq_rag, "embedding_model", None)
+        if semantic_threshold and embedding_model is not None:
+            self.faq_cache = SemanticResponseCache(
+                embed=embedding_model.embed_text,
+                similarity_threshold=float(semantic_threshold)
+            )
+        else:
+            self.faq_cache = SemanticResponseCache()
+        self.reply_cache = ResponseCache()
+        # Both caches hold answers derived from this version of the clinic data
+        self._faq_content_hash = getattr(faq_rag, "content_hash", None)
+
+        # Bound concurrent outbound LLM calls so bursts queue here instead of
+        # turning into provider 429s; past max waiters new turns fail fast
+        self._llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "32")))
+        self._llm_max_waiters = int(os.getenv("LLM_MAX_WAITERS", "128"))
+        self._llm_waiters = 0
+
+        # Past max messages, older turns are folded into a rolling summary
+        # in the background and only the most recent ones are resent
+        self._history_max_messages = int(os.getenv("HISTORY_MAX_MESSAGES", "20"))
+        self._history_keep_messages = int(os.getenv("HISTORY_KEEP_MESSAGES", "10"))
+        self._summarizing: set = set()
+        self._summary_tasks: set = set()
+        # Summaries have their own small concurrency limit rather than
+        # taking the LLM slots that patient turns queue on
+        self._summary_semaphore = asyncio.Semaphore(int(os.getenv("HISTORY_SUMMARY_CONCURRENCY", "2")))
 
         logger.info(f"Initialized SchedulingAgent with {llm_provider}/{llm_model}")
 
-    def _call_llm(self, messages: List[Dict[str, str]], tools: Optional[List[Dict]] = None) -> Dict:
+    async def aclose(self):
+        """Cancel background summaries and close the shared HTTP client"""
+        for task in list(self._summary_tasks):
+            task.cancel()
+        await asyncio.gather(*self._summary_tasks, return_exceptions=True)
+        await self._http.aclose()
+
+    @asynccontextmanager
+    async def _llm_slot(self, fail_fast: bool = True):
         """
-        Call the LLM with messages
+        Hold one of the bounded LLM concurrency slots
 
         Args:
-            messages: List of message dictionaries
-            tools: Optional tool definitions
+            fail_fast: Raise LLMBusyError instead of queueing when the wait
+                queue is full. Follow-up calls inside an already admitted
+                turn pass False so a turn is never dropped halfway through.
+        """
+        if fail_fast and self._llm_waiters >= self._llm_max_waiters:
+            raise LLMBusyError(f"{self._llm_waiters} LLM calls already waiting")
+
+        self._llm_waiters += 1
+        try:
+            await self._llm_semaphore.acquire()
+        finally:
+            self._llm_waiters -= 1
+
+        try:
+            yield
+        finally:
+            self._llm_semaphore.release()
+
+    async def _call_llm(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[Sequence[Dict]] = None,
+        fail_fast: bool = True,
+        executor: Optional[LLMExecutor] = None,
+        summary: Optional[str] = None,
+        tool_choice: str = "auto"
+    ) -> Dict:
+        """Call the LLM, within a concurrency slot for interactive executors (see _llm_slot)"""
+        executor = executor or self.llm_executor
+        request = self._build_llm_request(messages, tools, summary=summary, tool_choice=tool_choice)
+        if not executor.uses_llm_slots:
+            return await self._send_llm_request(request, executor)
+
+        async with self._llm_slot(fail_fast=fail_fast):
+            return await self._send_llm_request(request, executor)
+
+    async def _send_llm_request(self, request: Dict, executor: LLMExecutor) -> Dict:
+        """
+        Send a built request to the LLM
+
+        Args:
+            request: Provider request arguments (see _build_llm_request)
+            executor: Executor that sends the request
 
         Returns:
             LLM response
         """
+        response = await executor.create(request)
+        return self._parse_llm_response(response)
+
+    def _build_llm_request(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[Sequence[Dict]],
+        summary: Optional[str] = None,
+        tool_choice: str = "auto"
+    ) -> Dict:
+        """
+        Build the provider request arguments
+
+        The system prompt (and the summary of trimmed turns, if any) is added
+        here, per provider, so callers only pass the conversation turns.
+
+        Args:
+            messages: List of message dictionaries (without the system prompt)
+            tools: Optional tool definitions
+            summary: Optional summary of earlier, trimmed turns
+            tool_choice: "auto" or "none" (text reply only)
+        """
         if self.llm_provider == "openai":
+            system_messages = [_OPENAI_SYSTEM_MESSAGE]
+            if summary:
+                system_messages.append({"role": "system", "content": _SUMMARY_PREFIX + summary})
             kwargs = {
                 "model": self.llm_model,
-                "messages": messages,
+                "messages": system_messages + messages,
                 "temperature": 0.7
             }
             if tools:
                 kwargs["tools"] = tools
-                kwargs["tool_choice"] = "auto"
+                kwargs["tool_choice"] = tool_choice
+            return kwargs
+
+        kwargs = {
+            "model": self.llm_model,
+            "max_tokens": 2000,
+            "system": _ANTHROPIC_SYSTEM if not summary else [
+                _ANTHROPIC_SYSTEM_UNMARKED,
+                {"type": "text", "text": _SUMMARY_PREFIX + summary, "cache_control": _EPHEMERAL_CACHE}
+            ],
+            "messages": _with_cache_breakpoints(messages),
+            "temperature": 0.7
+        }
+        if tools:
+            kwargs["tools"] = tools
+            if tool_choice == "none":
+                kwargs["tool_choice"] = {"type": "none"}
+        return kwargs
 
-            response = self.llm_client.chat.completions.create(**kwargs)
+    def _build_summary_request(self, prompt: str) -> Dict:
+        """
+        Build the provider request arguments for a history summary
+
+        Unlike _build_llm_request, there are no tools and the system prompt
+        is the short summarizer prompt instead of the scheduling one.
 
-            # Parse response
+        Args:
+            prompt: Rendered HISTORY_SUMMARY_TEMPLATE
+        """
+        messages = [{"role": "user", "content": prompt}]
+        if self.llm_provider == "openai":
+            return {
+                "model": self.llm_model,
+                "messages": [{"role": "system", "content": HISTORY_SUMMARY_SYSTEM_PROMPT}] + messages,
+                "temperature": 0.3
+            }
+        return {
+            "model": self.llm_model,
+            "max_tokens": 500,
+            "system": HISTORY_SUMMARY_SYSTEM_PROMPT,
+            "messages": messages,
+            "temperature": 0.3
+        }
+
+    def _parse_llm_response(self, response: Any) -> Dict:
+        """Parse a provider response into {"content": str, "tool_calls": [...]}"""
+        if self.llm_provider == "openai":
             message = response.choices[0].message
             result = {
                 "content": message.content or "",
@@ -99,269 +605,111 @@ class SchedulingAgent:
                     result["tool_calls"].append({
                         "id": tool_call.id,
                         "name": tool_call.function.name,
-                        "arguments": json.loads(tool_call.function.arguments)
+                        "arguments": orjson.loads(tool_call.function.arguments)
                     })
 
             return result
 
-        elif self.llm_provider == "anthropic":
-            kwargs = {
-                "model": self.llm_model,
-                "max_tokens": 2000,
-                "messages": messages,
-                "temperature": 0.7
-            }
-            if tools:
-                kwargs["tools"] = tools
+        # anthropic
+        result = {
+            "content": "",
+            "tool_calls": []
+        }
 
-            response = self.llm_client.messages.create(**kwargs)
+        for block in response.content:
+            if block.type == "text":
+                result["content"] += block.text
+            elif block.type == "tool_use":
+                result["tool_calls"].append({
+                    "id": block.id,
+                    "name": block.name,
+                    "arguments": block.input
+                })
 
-            # Parse response
-            result = {
-                "content": "",
-                "tool_calls": []
-            }
+        return result
 
-            for block in response.content:
-                if block.type == "text":
-                    result["content"] += block.text
-                elif block.type == "tool_use":
-                    result["tool_calls"].append({
-                        "id": block.id,
-                        "name": block.name,
-                        "arguments": block.input
-                    })
+    async def _stream_llm(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[Sequence[Dict]] = None,
+        fail_fast: bool = True,
+        summary: Optional[str] = None,
+        tool_choice: str = "auto"
+    ) -> AsyncIterator[Union[str, Dict]]:
+        """
+        Stream an LLM response
 
-            return result
+        Yields text deltas (str) as they arrive, then the parsed response
+        (dict, same shape as _call_llm) as the last item.
+        """
+        kwargs = self._build_llm_request(messages, tools, summary=summary, tool_choice=tool_choice)
 
-    def _get_tool_definitions(self) -> List[Dict]:
-        """Get tool definitions for function calling"""
-        if self.llm_provider == "openai":
-            return [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "check_availability",
-                        "description": "Check available appointment slots for a specific date",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "date": {
-                                    "type": "string",
-                                    "description": "Date in YYYY-MM-DD format"
-                                },
-                                "appointment_type": {
-                                    "type": "string",
-                                    "enum": ["consultation", "followup", "physical", "specialist"],
-                                    "description": "Type of appointment"
-                                },
-                                "time_preference": {
-                                    "type": "string",
-                                    "enum": ["morning", "afternoon", "evening", "any"],
-                                    "description": "Preferred time of day"
-                                }
-                            },
-                            "required": ["date", "appointment_type"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "suggest_slots",
-                        "description": "Get suggested time slots based on patient preferences",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "preferred_date": {
-                                    "type": "string",
-                                    "description": "Preferred date in YYYY-MM-DD format (optional)"
-                                },
-                                "appointment_type": {
-                                    "type": "string",
-                                    "enum": ["consultation", "followup", "physical", "specialist"],
-                                    "description": "Type of appointment"
-                                },
-                                "time_preference": {
-                                    "type": "string",
-                                    "enum": ["morning", "afternoon", "evening", "any"],
-                                    "description": "Preferred time of day"
-                                },
-                                "num_suggestions": {
-                                    "type": "integer",
-                                    "description": "Number of suggestions to return (default 5)"
-                                }
-                            },
-                            "required": ["appointment_type"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "book_appointment",
-                        "description": "Book an appointment - ONLY use after patient explicitly confirms all details",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "appointment_type": {
-                                    "type": "string",
-                                    "enum": ["consultation", "followup", "physical", "specialist"]
-                                },
-                                "date": {
-                                    "type": "string",
-                                    "description": "Date in YYYY-MM-DD format"
-                                },
-                                "start_time": {
-                                    "type": "string",
-                                    "description": "Start time in HH:MM format"
-                                },
-                                "patient_name": {
-                                    "type": "string"
-                                },
-                                "patient_email": {
-                                    "type": "string"
-                                },
-                                "patient_phone": {
-                                    "type": "string"
-                                },
-                                "reason": {
-                                    "type": "string"
-                                }
-                            },
-                            "required": ["appointment_type", "date", "start_time", "patient_name", "patient_email", "patient_phone", "reason"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "answer_faq",
-                        "description": "Search the clinic knowledge base to answer questions about the clinic, policies, insurance, etc.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "question": {
-                                    "type": "string",
-                                    "description": "The patient's question"
-                                }
-                            },
-                            "required": ["question"]
-                        }
-                    }
-                }
-            ]
-        else:  # anthropic
-            return [
-                {
-                    "name": "check_availability",
-                    "description": "Check available appointment slots for a specific date",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "date": {
-                                "type": "string",
-                                "description": "Date in YYYY-MM-DD format"
-                            },
-                            "appointment_type": {
-                                "type": "string",
-                                "enum": ["consultation", "followup", "physical", "specialist"],
-                                "description": "Type of appointment"
-                            },
-                            "time_preference": {
-                                "type": "string",
-                                "enum": ["morning", "afternoon", "evening", "any"],
-                                "description": "Preferred time of day"
-                            }
-                        },
-                        "required": ["date", "appointment_type"]
-                    }
-                },
-                {
-                    "name": "suggest_slots",
-                    "description": "Get suggested time slots based on patient preferences",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "preferred_date": {
-                                "type": "string",
-                                "description": "Preferred date in YYYY-MM-DD format (optional)"
-                            },
-                            "appointment_type": {
-                                "type": "string",
-                                "enum": ["consultation", "followup", "physical", "specialist"],
-                                "description": "Type of appointment"
-                            },
-                            "time_preference": {
-                                "type": "string",
-                                "enum": ["morning", "afternoon", "evening", "any"],
-                                "description": "Preferred time of day"
-                            },
-                            "num_suggestions": {
-                                "type": "integer",
-                                "description": "Number of suggestions to return (default 5)"
-                            }
-                        },
-                        "required": ["appointment_type"]
-                    }
-                },
-                {
-                    "name": "book_appointment",
-                    "description": "Book an appointment - ONLY use after patient explicitly confirms all details",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "appointment_type": {
-                                "type": "string",
-                                "enum": ["consultation", "followup", "physical", "specialist"]
-                            },
-                            "date": {
-                                "type": "string",
-                                "description": "Date in YYYY-MM-DD format"
-                            },
-                            "start_time": {
-                                "type": "string",
-                                "description": "Start time in HH:MM format"
-                            },
-                            "patient_name": {
-                                "type": "string"
-                            },
-                            "patient_email": {
-                                "type": "string"
-                            },
-                            "patient_phone": {
-                                "type": "string"
-                            },
-                            "reason": {
-                                "type": "string"
-                            }
-                        },
-                        "required": ["appointment_type", "date", "start_time", "patient_name", "patient_email", "patient_phone", "reason"]
-                    }
-                },
-                {
-                    "name": "answer_faq",
-                    "description": "Search the clinic knowledge base to answer questions",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "question": {
-                                "type": "string",
-                                "description": "The patient's question"
-                            }
-                        },
-                        "required": ["question"]
+        async with self._llm_slot(fail_fast=fail_fast):
+            if self.llm_provider == "anthropic":
+                async with self.llm_client.messages.stream(**kwargs) as stream:
+                    async for text in stream.text_stream:
+                        yield text
+                    final_message = await stream.get_final_message()
+                yield self._parse_llm_response(final_message)
+                return
+
+            # openai: tool calls arrive as fragments keyed by index
+            content_parts = []
+            tool_calls: Dict[int, Dict] = {}
+            stream = await self.llm_client.chat.completions.create(**kwargs, stream=True)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield delta.content
+                for fragment in delta.tool_calls or []:
+                    tool_call = tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                    if fragment.id:
+                        tool_call["id"] = fragment.id
+                    if fragment.function and fragment.function.name:
+                        tool_call["name"] += fragment.function.name
+                    if fragment.function and fragment.function.arguments:
+                        tool_call["arguments"] += fragment.function.arguments
+
+            yield {
+                "content": "".join(content_parts),
+                "tool_calls": [
+                    {
+                        "id": tool_call["id"],
+                        "name": tool_call["name"],
+                        "arguments": orjson.loads(tool_call["arguments"] or "{}")
                     }
-                }
-            ]
+                    for _, tool_call in sorted(tool_calls.items())
+                ]
+            }
+
+    def _get_tool_definitions(self) -> Tuple[Dict, ...]:
+        """Get tool definitions for function calling"""
+        return _OPENAI_TOOLS if self.llm_provider == "openai" else _ANTHROPIC_TOOLS
+
+    async def _execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict:
+        """
+        Execute a tool call
+
+        The tools are synchronous (file and vector store I/O), so they run in a
+        worker thread to keep the event loop free for other conversations.
+        """
+        if tool_name == "answer_faq":
+            return (await self._answer_faqs([arguments]))[0]
 
-    def _execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict:
-        """Execute a tool call"""
         logger.info(f"Executing tool: {tool_name} with args: {arguments}")
 
+        # Malformed calls go straight back to the model to fix in this turn
+        invalid = _validate_tool_arguments(tool_name, arguments)
+        if invalid:
+            return invalid
+
         try:
             if tool_name == "check_availability":
-                result = self.availability_tool.check_availability(
+                result = await asyncio.to_thread(
+                    self.availability_tool.check_availability,
                     date_str=arguments['date'],
                     appointment_type=arguments['appointment_type'],
                     time_preference=arguments.get('time_preference')
@@ -369,7 +717,8 @@ class SchedulingAgent:
                 return {"success": True, "data": result}
 
             elif tool_name == "suggest_slots":
-                result = self.availability_tool.suggest_slots(
+                result = await asyncio.to_thread(
+                    self.availability_tool.suggest_slots,
                     preferred_date=arguments.get('preferred_date'),
                     appointment_type=arguments['appointment_type'],
                     time_preference=arguments.get('time_preference'),
@@ -378,7 +727,8 @@ class SchedulingAgent:
                 return {"success": True, "data": result}
 
             elif tool_name == "book_appointment":
-                result = self.booking_tool.create_booking(
+                result = await asyncio.to_thread(
+                    self.booking_tool.create_booking,
                     appointment_type=arguments['appointment_type'],
                     date=arguments['date'],
                     start_time=arguments['start_time'],
@@ -389,10 +739,6 @@ class SchedulingAgent:
                 )
                 return {"success": result['status'] == 'confirmed', "data": result}
 
-            elif tool_name == "answer_faq":
-                context = self.faq_rag.get_context_for_question(arguments['question'])
-                return {"success": True, "data": {"context": context, "question": arguments['question']}}
-
             else:
                 return {"success": False, "error": f"Unknown tool: {tool_name}"}
 
@@ -400,7 +746,98 @@ class SchedulingAgent:
             logger.error(f"Error executing tool {tool_name}: {str(e)}")
             return {"success": False, "error": str(e)}
 
-    def chat(self, message: str, conversation_id: Optional[str] = None) -> Dict:
+    async def _answer_faqs(self, arguments_list: List[Dict[str, Any]]) -> List[Dict]:
+        """
+        Execute several answer_faq calls with a single batched retrieval
+
+        Args:
+            arguments_list: Arguments of each answer_faq call
+
+        Returns:
+            One tool result per call, in order
+        """
+        results: List[Optional[Dict]] = [
+            _validate_tool_arguments("answer_faq", arguments) for arguments in arguments_list
+        ]
+        valid_indexes = [idx for idx, result in enumerate(results) if result is None]
+        if not valid_indexes:
+            return results
+        logger.info(f"Executing tool: answer_faq for {len(valid_indexes)} questions")
+
+        questions = [arguments_list[idx]['question'] for idx in valid_indexes]
+        try:
+            contexts = await asyncio.to_thread(
+                self.faq_cache.get_or_set_many,
+                questions,
+                self.faq_rag.get_contexts_for_questions
+            )
+        except Exception as e:
+            logger.error(f"Error executing tool answer_faq: {str(e)}")
+            for idx in valid_indexes:
+                results[idx] = {"success": False, "error": str(e)}
+            return results
+
+        for idx, question, context in zip(valid_indexes, questions, contexts):
+            results[idx] = {"success": True, "data": {"context": context, "question": question}}
+        return results
+
+    def _tool_turn_messages(self, response: Dict, tool_results: Sequence[Dict]) -> List[Dict]:
+        """
+        Build the assistant tool-call message and its tool results in the
+        provider's native format
+
+        Args:
+            response: Parsed LLM response containing the tool calls
+            tool_results: Results of the tool calls, in the same order
+
+        Returns:
+            Messages to append to the LLM context
+        """
+        tool_calls = response["tool_calls"]
+
+        if self.llm_provider == "openai":
+            messages = [{
+                "role": "assistant",
+                "content": response["content"] or None,
+                "tool_calls": [
+                    {
+                        "id": tool_call["id"],
+                        "type": "function",
+                        "function": {
+                            "name": tool_call["name"],
+                            "arguments": orjson.dumps(tool_call["arguments"]).decode()
+                        }
+                    }
+                    for tool_call in tool_calls
+                ]
+            }]
+            messages.extend(
+                {"role": "tool", "tool_call_id": tool_call["id"], "content": orjson.dumps(result).decode()}
+                for tool_call, result in zip(tool_calls, tool_results)
+            )
+            return messages
+
+        # anthropic: tool_use blocks on the assistant turn, all tool_result
+        # blocks grouped in a single user turn
+        content = []
+        if response["content"]:
+            content.append({"type": "text", "text": response["content"]})
+        content.extend(
+            {"type": "tool_use", "id": tool_call["id"], "name": tool_call["name"], "input": tool_call["arguments"]}
+            for tool_call in tool_calls
+        )
+        return [
+            {"role": "assistant", "content": content},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "tool_result", "tool_use_id": tool_call["id"], "content": orjson.dumps(result).decode()}
+                    for tool_call, result in zip(tool_calls, tool_results)
+                ]
+            }
+        ]
+
+    async def chat(self, message: str, conversation_id: Optional[str] = None) -> Dict:
         """
         Process a chat message
 
@@ -411,64 +848,333 @@ class SchedulingAgent:
         Returns:
             Dictionary with response and conversation_id
         """
+        return await self._run_turn(message, conversation_id, self.llm_executor)
+
+    async def chat_bulk(self, messages: List[str]) -> List[Dict]:
+        """
+        Process many independent opening messages through the provider batch API
+
+        Meant for offline workloads (seeding, evals, regression runs): results
+        are cheaper but can take minutes to hours. Each message starts its
+        own conversation.
+
+        Args:
+            messages: User messages, one per new conversation
+
+        Returns:
+            One chat result per message, in the same order
+        """
+        return await asyncio.gather(*[
+            self._run_turn(message, None, self.batch_executor)
+            for message in messages
+        ])
+
+    async def stream_chat(self, message: str, conversation_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Process a chat message, streaming the reply as it is generated
+
+        Args:
+            message: User message
+            conversation_id: Optional conversation ID (creates new if not provided)
+
+        Yields:
+            {"type": "delta", "content": str} events as reply text arrives, then
+            a final {"type": "done", ...} event carrying the same fields as chat()
+        """
+        conversation_id, conversation = await self._start_turn(message, conversation_id)
+        llm_messages = conversation.llm_messages
+        tools = self._get_tool_definitions()
+
+        cache_key, response = await self._cached_reply(conversation, tools)
+        if response is not None:
+            yield {"type": "delta", "content": response["content"]}
+            yield {"type": "done", **await self._finish_turn(conversation_id, conversation, response)}
+            return
+
+        # Every delta sent, including text streamed before a tool round, so
+        # the done event and the transcript match what the patient saw
+        streamed = []
+        fail_fast = True
+        while True:
+            try:
+                async for item in self._stream_llm(
+                    llm_messages,
+                    tools=tools,
+                    fail_fast=fail_fast,
+                    summary=conversation.summary,
+                    tool_choice="auto" if fail_fast else "none"
+                ):
+                    if isinstance(item, str):
+                        streamed.append(item)
+                        yield {"type": "delta", "content": item}
+                    else:
+                        response = item
+            except LLMBusyError as e:
+                yield {"type": "done", **self._busy_result(conversation_id, conversation, e)}
+                return
+
+            # Only a single tool round per turn, as in chat()
+            if not fail_fast or not response["tool_calls"]:
+                break
+            tool_results = await self._run_tools(response, llm_messages)
+            _update_phase(conversation, response, tool_results)
+            if not _all_cacheable(response):
+                cache_key = None
+
+            local_reply = _render_slot_reply(response, tool_results)
+            if local_reply is not None:
+                response = {"content": local_reply, "tool_calls": []}
+                streamed.append(local_reply)
+                yield {"type": "delta", "content": local_reply}
+                break
+            fail_fast = False
+
+        yield {"type": "done", **await self._finish_turn(
+            conversation_id, conversation, response, cache_key, reply="".join(streamed)
+        )}
+
+    async def _start_turn(self, message: str, conversation_id: Optional[str]) -> Tuple[str, ConversationState]:
+        """Load (or create) the conversation and record the user message"""
         # Create or get conversation
         if not conversation_id:
             conversation_id = str(uuid.uuid4())
-            self.conversations[conversation_id] = ConversationState(
-                conversation_id=conversation_id,
-                phase="greeting",
-                messages=[]
-            )
 
-        conversation = self.conversations.get(conversation_id)
-        if not conversation:
+        conversation = await self.conversation_store.get(conversation_id)
+        if conversation is None:
             conversation = ConversationState(
                 conversation_id=conversation_id,
                 phase="greeting",
                 messages=[]
             )
-            self.conversations[conversation_id] = conversation
 
         # Add user message
         user_msg = ChatMessage(role="user", content=message)
         conversation.messages.append(user_msg)
 
-        # Build messages for LLM
-        llm_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        # The LLM transcript is kept on the conversation and grows in place,
+        # so earlier turns are never rebuilt and the prefix stays cacheable
+        # (system prompt is added by _call_llm)
+        conversation.llm_messages.append({"role": "user", "content": message})
 
-        for msg in conversation.messages:
-            llm_messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
+        return conversation_id, conversation
 
-        # Get tools
-        tools = self._get_tool_definitions()
+    def _busy_result(self, conversation_id: str, conversation: ConversationState, error: LLMBusyError) -> Dict:
+        """Undo the unanswered user turn and build the 'system busy' reply"""
+        logger.warning(f"LLM capacity exhausted, turning away message: {error}")
+        # Drop the unanswered turn so the patient can simply resend it
+        conversation.llm_messages.pop()
+        conversation.messages.pop()
+        return {
+            "message": SYSTEM_BUSY_MESSAGE,
+            "conversation_id": conversation_id,
+            "metadata": {
+                "phase": conversation.phase,
+                "message_count": len(conversation.messages),
+                "busy": True
+            }
+        }
 
-        # Call LLM
-        response = self._call_llm(llm_messages, tools=tools)
+    async def _run_tools(self, response: Dict, llm_messages: List[Dict]) -> List[Dict]:
+        """
+        Run a response's tool calls concurrently and append the tool turn
 
-        # Handle tool calls
-        if response["tool_calls"]:
-            for tool_call in response["tool_calls"]:
-                tool_result = self._execute_tool(tool_call["name"], tool_call["arguments"])
+        Returns:
+            The tool results, in call order
+        """
+        tool_calls = response["tool_calls"]
+
+        # All answer_faq calls of the response share one batched retrieval;
+        # every other tool runs concurrently alongside it
+        faq_indexes = [idx for idx, tool_call in enumerate(tool_calls) if tool_call["name"] == "answer_faq"]
+        other_indexes = [idx for idx, tool_call in enumerate(tool_calls) if tool_call["name"] != "answer_faq"]
+        faq_results, *other_results = await asyncio.gather(
+            self._answer_faqs([tool_calls[idx]["arguments"] for idx in faq_indexes]),
+            *[
+                self._execute_tool(tool_calls[idx]["name"], tool_calls[idx]["arguments"])
+                for idx in other_indexes
+            ]
+        )
+
+        tool_results: List[Dict] = [None] * len(tool_calls)
+        for idx, result in zip(faq_indexes + other_indexes, list(faq_results) + other_results):
+            tool_results[idx] = result
+
+        llm_messages.extend(self._tool_turn_messages(response, tool_results))
+        return tool_results
+
+    async def _sync_faq_content(self):
+        """Pick up clinic data changes, dropping FAQ answers cached from the old content"""
+        if self.faq_rag is None:
+            return
+        await asyncio.to_thread(self.faq_rag.reload_if_changed)
+        content_hash = self.faq_rag.content_hash
+        if content_hash == self._faq_content_hash:
+            return
+        logger.info("Clinic data changed; clearing cached FAQ answers and replies")
+        self.faq_cache.clear()
+        self.reply_cache.clear()
+        self._faq_content_hash = content_hash
+
+    async def _cached_reply(self, conversation: ConversationState, tools: Sequence[Dict]) -> Tuple[str, Optional[Dict]]:
+        """
+        Look up the final reply for the rendered prompt of this turn
+
+        On a hit the conversation moves to the phase the cached turn ended in.
+
+        Returns:
+            The cache key, and the cached response (None on a miss)
+        """
+        await self._sync_faq_content()
+        request = self._build_llm_request(conversation.llm_messages, tools, summary=conversation.summary)
+        cache_key = hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        cached = self.reply_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        logger.info("Answering turn from the reply cache")
+        content, conversation.phase = cached
+        return cache_key, {"content": content, "tool_calls": []}
 
-                # Add tool result to conversation context
-                tool_msg = f"[Tool: {tool_call['name']} executed. Result: {json.dumps(tool_result)}]"
-                llm_messages.append({"role": "assistant", "content": tool_msg})
+    async def _finish_turn(
+        self,
+        conversation_id: str,
+        conversation: ConversationState,
+        response: Dict,
+        cache_key: Optional[str] = None,
+        reply: Optional[str] = None
+    ) -> Dict:
+        """
+        Record the assistant reply, persist the conversation and build the result
 
-                # Get final response with tool results
-                response = self._call_llm(llm_messages, tools=tools)
+        Args:
+            conversation_id: Conversation ID
+            conversation: Conversation state
+            response: Final LLM response of the turn
+            cache_key: Optional reply cache key to store the reply under
+            reply: Text the patient was shown, if more than the response
+                content (streamed text that came before a tool round, which
+                the LLM transcript already has on the tool turn)
+        """
+        reply = response["content"] if reply is None else reply
 
         # Add assistant response to conversation
-        assistant_msg = ChatMessage(role="assistant", "content"=response["content"])
+        assistant_msg = ChatMessage(role="assistant", content=reply)
         conversation.messages.append(assistant_msg)
+        if response["content"]:
+            conversation.llm_messages.append({"role": "assistant", "content": response["content"]})
+        if reply and cache_key:
+            self.reply_cache.put(cache_key, (reply, conversation.phase))
+
+        await self.conversation_store.put(conversation_id, conversation)
+        self._schedule_summary(conversation_id, conversation)
 
         return {
-            "message": response["content"],
+            "message": reply,
             "conversation_id": conversation_id,
             "metadata": {
                 "phase": conversation.phase,
                 "message_count": len(conversation.messages)
             }
         }
+
+    async def _run_turn(self, message: str, conversation_id: Optional[str], executor: LLMExecutor) -> Dict:
+        """Run one user turn, sending LLM requests through the given executor"""
+        conversation_id, conversation = await self._start_turn(message, conversation_id)
+        llm_messages = conversation.llm_messages
+
+        # Get tools
+        tools = self._get_tool_definitions()
+
+        # Identical prompts (e.g. a new conversation opening with a common
+        # FAQ) are answered without calling the LLM
+        cache_key, response = await self._cached_reply(conversation, tools)
+        if response is not None:
+            return await self._finish_turn(conversation_id, conversation, response)
+
+        # Call LLM
+        try:
+            response = await self._call_llm(
+                llm_messages, tools=tools, executor=executor, summary=conversation.summary
+            )
+        except LLMBusyError as e:
+            return self._busy_result(conversation_id, conversation, e)
+
+        # Handle tool calls: run them concurrently, then make a single
+        # follow-up call with every result
+        if response["tool_calls"]:
+            tool_results = await self._run_tools(response, llm_messages)
+            _update_phase(conversation, response, tool_results)
+            if not _all_cacheable(response):
+                cache_key = None
+
+            # Slot lookups the model had nothing to add to are rendered
+            # locally instead of making the follow-up call
+            local_reply = _render_slot_reply(response, tool_results)
+            if local_reply is not None:
+                response = {"content": local_reply, "tool_calls": []}
+            else:
+                # Get final response with tool results. Only one tool round
+                # runs per turn, so this call must answer in text; the tool
+                # definitions stay in the request to keep the prefix cached
+                response = await self._call_llm(
+                    llm_messages,
+                    tools=tools,
+                    fail_fast=False,
+                    executor=executor,
+                    summary=conversation.summary,
+                    tool_choice="none"
+                )
+
+        return await self._finish_turn(conversation_id, conversation, response, cache_key)
+
+    def _schedule_summary(self, conversation_id: str, conversation: ConversationState):
+        """Start a background summary of older turns once the transcript is too long"""
+        if len(conversation.llm_messages) <= self._history_max_messages:
+            return
+        if conversation_id in self._summarizing:
+            return
+
+        self._summarizing.add(conversation_id)
+        task = asyncio.create_task(self._summarize_history(conversation_id))
+        self._summary_tasks.add(task)
+        task.add_done_callback(self._summary_tasks.discard)
+
+    async def _summarize_history(self, conversation_id: str):
+        """
+        Fold the older turns of a conversation into its rolling summary
+
+        Runs in the background after a turn. Only the most recent messages
+        (from a patient message on, so tool calls stay with their results)
+        are kept verbatim.
+        """
+        try:
+            conversation = await self.conversation_store.get(conversation_id)
+            if conversation is None:
+                return
+
+            split = _history_split(conversation.llm_messages, self._history_keep_messages)
+            if split == 0:
+                return
+            dropped = conversation.llm_messages[:split]
+
+            prompt = HISTORY_SUMMARY_TEMPLATE.render(
+                previous_summary=conversation.summary or "None",
+                transcript=_render_transcript(dropped)
+            )
+            async with self._summary_semaphore:
+                response = await self._send_llm_request(self._build_summary_request(prompt), self.llm_executor)
+            if not response["content"]:
+                return
+
+            # The conversation may have moved on while summarizing; turns are
+            # only ever appended, so the summarized prefix is still in place
+            conversation = await self.conversation_store.get(conversation_id)
+            if conversation is None or conversation.llm_messages[:split] != dropped:
+                return
+            conversation.summary = response["content"]
+            del conversation.llm_messages[:split]
+            await self.conversation_store.put(conversation_id, conversation)
+            logger.info(f"Summarized {split} messages of conversation {conversation_id}")
+        except Exception as e:
+            logger.error(f"Error summarizing conversation {conversation_id}: {str(e)}")
+        finally:
+            self._summarizing.discard(conversation_id)
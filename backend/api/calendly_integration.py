@@ -1,28 +1,139 @@
+import bisect
 import json
 import logging
+import os
+import secrets
+import threading
+import time as systime
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta, date, time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
-import uuid
+import numpy as np
+import orjson
 import pytz
 
+try:
+    import fcntl
+except ImportError:  # Windows: bookings are only serialized within one process
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+# [start, end) minutes since midnight of each time_preference window
+_TIME_PREFERENCE_MINUTES = {
+    "morning": (6 * 60, 12 * 60),
+    "afternoon": (12 * 60, 17 * 60),
+    "evening": (17 * 60, 22 * 60)
+}
+
+
+class _BookedIntervals:
+    """
+    A day's confirmed bookings as (start, end) minute intervals
+
+    Intervals are kept sorted by start together with the running maximum of
+    their ends, which makes an overlap check one bisect even when bookings
+    overlap each other (as seeded or hand-edited schedules may).
+    """
+
+    __slots__ = ("intervals", "max_ends", "_arrays")
+
+    def __init__(self, intervals: List[Tuple[int, int]] = ()):
+        self.intervals: List[Tuple[int, int]] = sorted(intervals)
+        self.max_ends: List[int] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._update_max_ends(0)
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def _update_max_ends(self, idx: int):
+        """Recompute the running maximum end from position idx onwards"""
+        del self.max_ends[idx:]
+        running = self.max_ends[-1] if self.max_ends else 0
+        for _, end in self.intervals[idx:]:
+            running = max(running, end)
+            self.max_ends.append(running)
+        self._arrays = None
+
+    def add(self, interval: Tuple[int, int]):
+        """Insert an interval"""
+        idx = bisect.bisect_right(self.intervals, interval)
+        self.intervals.insert(idx, interval)
+        self._update_max_ends(idx)
+
+    def remove(self, interval: Tuple[int, int]) -> bool:
+        """Remove one occurrence of an interval, returning whether it was present"""
+        idx = bisect.bisect_left(self.intervals, interval)
+        if idx == len(self.intervals) or self.intervals[idx] != interval:
+            return False
+        del self.intervals[idx]
+        self._update_max_ends(idx)
+        return True
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Whether any interval overlaps [start, end)"""
+        # Intervals before idx are exactly those starting before the slot ends
+        idx = bisect.bisect_left(self.intervals, (end,))
+        return idx > 0 and self.max_ends[idx - 1] > start
+
+    def overlaps_many(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Vectorized overlaps for arrays of [start, end) slots"""
+        if not self.intervals:
+            return np.zeros(len(starts), dtype=bool)
+        if self._arrays is None:
+            self._arrays = (
+                np.array([start for start, _ in self.intervals]),
+                np.array(self.max_ends)
+            )
+        interval_starts, max_ends = self._arrays
+        idx = np.searchsorted(interval_starts, ends, side="left") - 1
+        return (idx >= 0) & (max_ends[np.maximum(idx, 0)] > starts)
+
+
+@dataclass(slots=True)
+class _DayContext:
+    """Everything a slot check needs about one date, looked up once per date"""
+
+    work_start: int
+    work_end: int
+    lunch_start: int
+    lunch_end: int
+    bookings: Optional[_BookedIntervals]
+
 
 class CalendlyMockAPI:
     """Mock implementation of Calendly API for appointment scheduling"""
 
-    def __init__(self, schedule_path: str = "./data/doctor_schedule.json"):
+    # "HH:MM" for every minute of the day (through 24:00), indexed by minutes
+    # since midnight, so slot times are looked up instead of formatted
+    _MIN_TO_HHMM: Tuple[str, ...] = tuple(f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60 + 1))
+
+    def __init__(self, schedule_path: str = "./data/doctor_schedule.json", compact_every: int = 100):
         """
         Initialize mock Calendly API
 
         Args:
             schedule_path: Path to doctor schedule JSON file
+            compact_every: Fold the booking log into the schedule file after
+                this many logged changes
         """
         self.schedule_path = schedule_path
-        self.schedule_data = self._load_schedule()
-        self.bookings = self._load_existing_appointments()
-        self.timezone = pytz.timezone(self.schedule_data['doctor_info']['timezone'])
+        # Booking changes are appended here and compacted into the schedule
+        # file periodically, instead of rewriting the whole file every time
+        schedule_file = Path(schedule_path)
+        self.bookings_log_path = str(schedule_file.with_name(f"{schedule_file.stem}.bookings.jsonl"))
+        self.lock_path = str(schedule_file.with_name(f"{schedule_file.stem}.lock"))
+        self.compact_every = compact_every
+
+        # Serializes check-then-write on bookings; tools run in worker threads,
+        # and _locked() adds a file lock for other processes on the same files
+        self._booking_lock = threading.Lock()
+        # Bumped on every booking change and schedule reload, so callers
+        # caching availability can tell when their results are stale
+        self.bookings_version = 0
 
         # Appointment type durations (in minutes)
         self.appointment_durations = {
@@ -32,41 +143,285 @@ class CalendlyMockAPI:
             "specialist": 60
         }
 
+        with self._locked():
+            self._load_state()
+
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the booking lock, across processes as well as threads
+
+        Every process sharing the schedule takes an exclusive flock() on the
+        lock file around reading, checking and writing bookings, so two
+        workers can't book the same slot or compact away each other's
+        bookings.
+        """
+        with self._booking_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load_state(self):
+        """Load the schedule file and booking log and build the lookup structures from them"""
+        self._log_entries = 0
+        # Bytes of the booking log replayed so far
+        self._log_offset = 0
+        self.schedule_data = self._load_schedule()
+        self.bookings = self._load_existing_appointments()
+        self.timezone = pytz.timezone(self.schedule_data['doctor_info']['timezone'])
+        # (epoch minute, clinic-local date) of the last _today() call
+        self._today_cache: Tuple[int, Optional[date]] = (-1, None)
+
+        # Working hours per weekday and the lunch break, as minutes since
+        # midnight, parsed once instead of on every slot check
+        self._working_minutes: Dict[str, Optional[Tuple[int, int]]] = {
+            day_name: (
+                self._parse_minutes(hours['start']),
+                self._parse_minutes(hours['end'])
+            ) if hours else None
+            for day_name, hours in self.schedule_data['working_hours'].items()
+        }
+        lunch_break = self._get_lunch_break()
+        self._lunch_minutes: Tuple[int, int] = (
+            self._parse_minutes(lunch_break['start']),
+            self._parse_minutes(lunch_break['end'])
+        )
+
+        # Confirmed bookings as (start, end) minute intervals per date, so a
+        # slot check only looks at that day's bookings
+        day_intervals: Dict[str, List[Tuple[int, int]]] = {}
+        for booking in self.bookings:
+            if booking.get('status') == 'confirmed':
+                day_intervals.setdefault(booking['date'], []).append(self._booking_interval(booking))
+        self._bookings_by_date: Dict[str, _BookedIntervals] = {
+            date_str: _BookedIntervals(intervals) for date_str, intervals in day_intervals.items()
+        }
+
+        # Bookings by ID for lookups and cancellation; seeded appointments
+        # may have no ID, and the first booking wins as with a linear scan
+        self._bookings_by_id: Dict[str, Dict] = {}
+        for booking in self.bookings:
+            if booking.get('booking_id'):
+                self._bookings_by_id.setdefault(booking['booking_id'], booking)
+
+        self.bookings_version += 1
+
+    def reload_if_changed(self):
+        """
+        Pick up changes someone else made to the schedule file or booking log
+
+        Two stat() calls when nothing changed. Called at the start of every
+        public lookup; booking operations sync under the lock instead.
+        """
+        if self._disk_state() in (None, (self._schedule_mtime, self._log_offset)):
+            return
+
+        with self._locked():
+            self._sync_with_disk()
+
+    def _disk_state(self) -> Optional[Tuple[int, int]]:
+        """Get the schedule file mtime and booking log size on disk, or None if the schedule can't be read"""
+        try:
+            schedule_mtime = os.stat(self.schedule_path).st_mtime_ns
+        except OSError:
+            return None
+        try:
+            log_size = os.stat(self.bookings_log_path).st_size
+        except OSError:
+            log_size = 0
+        return schedule_mtime, log_size
+
+    def _sync_with_disk(self):
+        """
+        Catch up with changes other processes made; the caller holds _locked()
+
+        Records appended to the booking log are replayed onto the current
+        state. A rewritten schedule file (an edit, or another process
+        compacting the log) means reloading everything.
+        """
+        state = self._disk_state()
+        if state is None or state == (self._schedule_mtime, self._log_offset):
+            return
+
+        schedule_mtime, log_size = state
+        if schedule_mtime != self._schedule_mtime or log_size < self._log_offset:
+            logger.info(f"{self.schedule_path} changed on disk; reloading schedule")
+            self._load_state()
+            return
+
+        for record in self._read_log(self._log_offset):
+            if record['op'] == 'book' and record['booking']['booking_id'] not in self._bookings_by_id:
+                self._add_booking(record['booking'])
+            elif record['op'] == 'cancel' and record['booking_id'] in self._bookings_by_id:
+                self._mark_cancelled(self._bookings_by_id[record['booking_id']])
+        self.bookings_version += 1
+
     def _load_schedule(self) -> Dict:
         """Load doctor schedule from JSON file"""
         logger.info(f"Loading schedule from {self.schedule_path}")
-        with open(self.schedule_path, 'r') as f:
-            data = json.load(f)
+        with open(self.schedule_path, 'rb') as f:
+            self._schedule_mtime = os.fstat(f.fileno()).st_mtime_ns
+            data = orjson.loads(f.read())
         return data
 
     def _load_existing_appointments(self) -> List[Dict]:
-        """Load existing appointments from schedule"""
-        return self.schedule_data.get('existing_appointments', [])
+        """Load existing appointments from schedule, then replay the booking log"""
+        bookings = self.schedule_data.get('existing_appointments', [])
+        if not os.path.exists(self.bookings_log_path):
+            return bookings
+
+        by_id = {booking['booking_id']: booking for booking in bookings if booking.get('booking_id')}
+        for record in self._read_log():
+            # Replaying is idempotent: a crash between compaction and
+            # truncating the log leaves records already in the schedule
+            if record['op'] == 'book' and record['booking']['booking_id'] not in by_id:
+                bookings.append(record['booking'])
+                by_id[record['booking']['booking_id']] = record['booking']
+            elif record['op'] == 'cancel' and record['booking_id'] in by_id:
+                by_id[record['booking_id']]['status'] = 'cancelled'
+
+        logger.info(f"Replayed {self._log_entries} booking log entries")
+        return bookings
+
+    def _read_log(self, offset: int = 0) -> List[Dict]:
+        """
+        Read the booking log records after a byte offset
 
-    def _save_booking(self, booking: Dict):
-        """Save a new booking to the schedule file"""
+        Advances _log_offset past the records read. The caller holds
+        _locked(), so no other process is midway through an append.
+        """
+        with open(self.bookings_log_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+
+        # Every record is written with its newline, so text after the last
+        # newline is a torn write from a crash. It is cut off, or the next
+        # append would land on the same line and be unreadable too.
+        *lines, torn = data.split(b"\n")
+        if torn:
+            logger.warning(f"Dropping torn last line of {self.bookings_log_path}")
+            with open(self.bookings_log_path, 'r+b') as f:
+                f.truncate(offset + len(data) - len(torn))
+        self._log_offset = offset + len(data) - len(torn)
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {self.bookings_log_path}")
+                continue
+            self._log_entries += 1
+        return records
+
+    def _add_booking(self, booking: Dict):
+        """Add a booking to the in-memory lookup structures"""
         self.bookings.append(booking)
-        self.schedule_data['existing_appointments'] = self.bookings
+        self._bookings_by_id[booking['booking_id']] = booking
+        if booking.get('status') == 'confirmed':
+            self._bookings_by_date.setdefault(booking['date'], _BookedIntervals()).add(self._booking_interval(booking))
 
-        # Save to file
-        with open(self.schedule_path, 'w') as f:
-            json.dump(self.schedule_data, f, indent=2)
+    def _mark_cancelled(self, booking: Dict):
+        """Mark a booking cancelled in the in-memory lookup structures"""
+        if booking.get('status') == 'confirmed' and booking['date'] in self._bookings_by_date:
+            self._bookings_by_date[booking['date']].remove(self._booking_interval(booking))
+        booking['status'] = 'cancelled'
+
+    def _save_booking(self, booking: Dict):
+        """Save a new booking to the booking log"""
+        self._add_booking(booking)
+        self.bookings_version += 1
+        self._append_log({"op": "book", "booking": booking})
         logger.info(f"Saved booking: {booking['booking_id']}")
 
+    def _append_log(self, record: Dict):
+        """Durably append one change to the booking log, compacting when it grows long"""
+        with open(self.bookings_log_path, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            # Our own append is not an outside change to replay
+            self._log_offset = os.fstat(f.fileno()).st_size
+
+        self._log_entries += 1
+        if self._log_entries >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        """Fold the booking log into the schedule file and start a new log"""
+        self._write_schedule()
+        open(self.bookings_log_path, 'w').close()
+        self._log_entries = 0
+        self._log_offset = 0
+        logger.info(f"Compacted booking log into {self.schedule_path}")
+
+    def _write_schedule(self):
+        """Atomically write the schedule, including all bookings, to the schedule file"""
+        self.schedule_data['existing_appointments'] = self.bookings
+        tmp_path = f"{self.schedule_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.schedule_data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.schedule_path)
+        # Our own write is not an outside change to reload
+        self._schedule_mtime = os.stat(self.schedule_path).st_mtime_ns
+
+    def _booking_interval(self, booking: Dict) -> Tuple[int, int]:
+        """Get a booking's (start, end) in minutes since midnight"""
+        return (
+            self._parse_minutes(booking['start_time']),
+            self._parse_minutes(booking['end_time'])
+        )
+
     def _parse_time(self, time_str: str) -> time:
         """Parse time string to time object"""
         return datetime.strptime(time_str, "%H:%M").time()
 
-    def _is_working_day(self, check_date: date) -> bool:
-        """Check if a given date is a working day"""
-        day_name = check_date.strftime("%A").lower()
-        working_hours = self.schedule_data['working_hours'].get(day_name)
-        return working_hours is not None
+    def _parse_minutes(self, time_str: str) -> int:
+        """
+        Parse an HH:MM time string to minutes since midnight
 
-    def _get_working_hours(self, check_date: date) -> Optional[Dict]:
-        """Get working hours for a specific date"""
-        day_name = check_date.strftime("%A").lower()
-        return self.schedule_data['working_hours'].get(day_name)
+        Canonical zero-padded times are sliced directly instead of going
+        through strptime; anything else (e.g. "9:00") falls back to it.
+
+        Raises:
+            ValueError: If the string is not a valid time
+        """
+        if len(time_str) == 5 and time_str[2] == ':' and time_str[:2].isdigit() and time_str[3:].isdigit():
+            hours, minutes = int(time_str[:2]), int(time_str[3:])
+            if hours < 24 and minutes < 60:
+                return hours * 60 + minutes
+        return self._time_to_minutes(self._parse_time(time_str))
+
+    def _today(self) -> date:
+        """
+        Get today's date in the clinic's timezone
+
+        Recomputed at most once per wall-clock minute. UTC offsets are whole
+        minutes, so the local date cannot change within one epoch minute.
+        """
+        minute = int(systime.time() // 60)
+        cached_minute, today = self._today_cache
+        if cached_minute != minute:
+            today = datetime.now(self.timezone).date()
+            self._today_cache = (minute, today)
+        return today
+
+    def is_working_day(self, check_date: date) -> bool:
+        """Check whether the doctor works on a date"""
+        self.reload_if_changed()
+        return self._get_working_minutes(check_date) is not None
+
+    def _get_working_minutes(self, check_date: date) -> Optional[Tuple[int, int]]:
+        """Get (start, end) working minutes for a specific date, or None if not a working day"""
+        return self._working_minutes.get(check_date.strftime("%A").lower())
 
     def _get_lunch_break(self) -> Dict:
         """Get lunch break times"""
@@ -76,16 +431,47 @@ class CalendlyMockAPI:
         """Convert time to minutes since midnight"""
         return t.hour * 60 + t.minute
 
-    def _minutes_to_time(self, minutes: int) -> time:
-        """Convert minutes since midnight to time"""
-        hours = minutes // 60
-        mins = minutes % 60
-        return time(hour=hours, minute=mins)
+    def _format_minutes(self, minutes: int) -> str:
+        """Format minutes since midnight as an HH:MM string"""
+        return self._MIN_TO_HHMM[minutes]
+
+    def _day_context(self, check_date: date) -> Optional[_DayContext]:
+        """Build the slot-check context for a date, or None if it is not a working day"""
+        working_minutes = self._get_working_minutes(check_date)
+        if not working_minutes:
+            return None
+
+        lunch_start_mins, lunch_end_mins = self._lunch_minutes
+        return _DayContext(
+            work_start=working_minutes[0],
+            work_end=working_minutes[1],
+            lunch_start=lunch_start_mins,
+            lunch_end=lunch_end_mins,
+            bookings=self._bookings_by_date.get(check_date.strftime("%Y-%m-%d"))
+        )
+
+    def _slot_clear(self, ctx: _DayContext, slot_start_mins: int, duration: int) -> bool:
+        """Check one slot against a day's working hours, lunch break and bookings"""
+        slot_end_mins = slot_start_mins + duration
+
+        # Check if slot is within working hours
+        if slot_start_mins < ctx.work_start or slot_end_mins > ctx.work_end:
+            return False
+
+        # If slot overlaps with lunch, it's not available
+        if not (slot_end_mins <= ctx.lunch_start or slot_start_mins >= ctx.lunch_end):
+            return False
+
+        # Check against existing appointments
+        if ctx.bookings and ctx.bookings.overlaps(slot_start_mins, slot_end_mins):
+            return False
+
+        return True
 
     def _is_slot_available(
         self,
         check_date: date,
-        start_time: time,
+        slot_start_mins: int,
         duration: int
     ) -> bool:
         """
@@ -93,76 +479,33 @@ class CalendlyMockAPI:
 
         Args:
             check_date: Date to check
-            start_time: Start time of slot
+            slot_start_mins: Start of slot in minutes since midnight
             duration: Duration in minutes
 
         Returns:
             True if slot is available, False otherwise
         """
-        # Check if it's a working day
-        if not self._is_working_day(check_date):
-            return False
-
-        # Get working hours
-        working_hours = self._get_working_hours(check_date)
-        if not working_hours:
-            return False
-
-        # Check if slot is within working hours
-        work_start = self._parse_time(working_hours['start'])
-        work_end = self._parse_time(working_hours['end'])
-
-        slot_start_mins = self._time_to_minutes(start_time)
-        slot_end_mins = slot_start_mins + duration
+        ctx = self._day_context(check_date)
+        return ctx is not None and self._slot_clear(ctx, slot_start_mins, duration)
 
-        work_start_mins = self._time_to_minutes(work_start)
-        work_end_mins = self._time_to_minutes(work_end)
-
-        if slot_start_mins < work_start_mins or slot_end_mins > work_end_mins:
-            return False
-
-        # Check if slot overlaps with lunch break
-        lunch_break = self._get_lunch_break()
-        lunch_start = self._parse_time(lunch_break['start'])
-        lunch_end = self._parse_time(lunch_break['end'])
-
-        lunch_start_mins = self._time_to_minutes(lunch_start)
-        lunch_end_mins = self._time_to_minutes(lunch_end)
-
-        # If slot overlaps with lunch, it's not available
-        if not (slot_end_mins <= lunch_start_mins or slot_start_mins >= lunch_end_mins):
-            return False
-
-        # Check against existing appointments
-        date_str = check_date.strftime("%Y-%m-%d")
-        for booking in self.bookings:
-            if booking['date'] == date_str and booking.get('status') == 'confirmed':
-                booking_start = self._parse_time(booking['start_time'])
-                booking_end = self._parse_time(booking['end_time'])
-
-                booking_start_mins = self._time_to_minutes(booking_start)
-                booking_end_mins = self._time_to_minutes(booking_end)
-
-                # Check for overlap
-                if not (slot_end_mins <= booking_start_mins or slot_start_mins >= booking_end_mins):
-                    return False
-
-        return True
-
-    def get_availability(
+    def _availability_arrays(
         self,
         date_str: str,
-        appointment_type: str = "consultation"
-    ) -> Dict:
+        appointment_type: str,
+        grids: Optional[Dict[Tuple[int, int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]]] = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
         """
-        Get available time slots for a specific date
+        Compute every potential slot of a day and whether it is available
 
         Args:
             date_str: Date string in format "YYYY-MM-DD"
             appointment_type: Type of appointment
+            grids: Optional memo of slot grids keyed by (work start, work end,
+                duration), shared across the dates of one bulk lookup
 
         Returns:
-            Dictionary with date and available slots
+            Sorted slot start minutes, end minutes and an availability mask,
+            or None if the date is invalid, in the past or not a working day
         """
         logger.info(f"Getting availability for {date_str}, type: {appointment_type}")
 
@@ -170,50 +513,76 @@ class CalendlyMockAPI:
             check_date = datetime.strptime(date_str, "%Y-%m-%d").date()
         except ValueError:
             logger.error(f"Invalid date format: {date_str}")
-            return {"date": date_str, "available_slots": []}
+            return None
 
         # Check if date is in the past
-        today = datetime.now(self.timezone).date()
+        today = self._today()
         if check_date < today:
             logger.warning(f"Date {date_str} is in the past")
-            return {"date": date_str, "available_slots": []}
+            return None
 
         # Get appointment duration
         duration = self.appointment_durations.get(appointment_type, 30)
 
-        # Get working hours
-        working_hours = self._get_working_hours(check_date)
-        if not working_hours:
+        # Get working hours, lunch break and bookings for the date
+        ctx = self._day_context(check_date)
+        if ctx is None:
             logger.info(f"{check_date.strftime('%A')} is not a working day")
-            return {"date": date_str, "available_slots": []}
-
-        # Generate potential slots
-        work_start = self._parse_time(working_hours['start'])
-        work_end = self._parse_time(working_hours['end'])
+            return None
 
         slot_duration = self.schedule_data.get('slot_duration_minutes', 15)
         buffer_time = self.schedule_data.get('buffer_time_minutes', 5)
 
-        available_slots = []
+        # Generate potential slots for the whole day at once; the checks
+        # match _slot_clear, done as array operations. Only bookings differ
+        # between days with the same hours, so the grid can be shared.
+        grid_key = (ctx.work_start, ctx.work_end, duration)
+        grid = grids.get(grid_key) if grids is not None else None
+        if grid is None:
+            grid_starts = np.arange(ctx.work_start, ctx.work_end - duration + 1, slot_duration)
+            grid_ends = grid_starts + duration
+            grid = (grid_starts, grid_ends, (grid_ends <= ctx.lunch_start) | (grid_starts >= ctx.lunch_end))
+            if grids is not None:
+                grids[grid_key] = grid
+
+        starts, ends, outside_lunch = grid
+        available = outside_lunch.copy()
+        if ctx.bookings:
+            available &= ~ctx.bookings.overlaps_many(starts, ends)
+
+        logger.info(f"Found {int(available.sum())} available slots")
+        return starts, ends, available
 
-        current_mins = self._time_to_minutes(work_start)
-        end_mins = self._time_to_minutes(work_end)
+    def get_availability(
+        self,
+        date_str: str,
+        appointment_type: str = "consultation"
+    ) -> Dict:
+        """
+        Get available time slots for a specific date
 
-        while current_mins + duration <= end_mins:
-            slot_start = self._minutes_to_time(current_mins)
-            slot_end = self._minutes_to_time(current_mins + duration)
+        Args:
+            date_str: Date string in format "YYYY-MM-DD"
+            appointment_type: Type of appointment
 
-            is_available = self._is_slot_available(check_date, slot_start, duration)
+        Returns:
+            Dictionary with date and available slots
+        """
+        self.reload_if_changed()
+        arrays = self._availability_arrays(date_str, appointment_type)
+        if arrays is None:
+            return {"date": date_str, "available_slots": []}
 
-            available_slots.append({
-                "start_time": slot_start.strftime("%H:%M"),
-                "end_time": slot_end.strftime("%H:%M"),
+        starts, ends, available = arrays
+        hhmm = self._MIN_TO_HHMM
+        available_slots = [
+            {
+                "start_time": hhmm[start],
+                "end_time": hhmm[end],
                 "available": is_available
-            })
-
-            current_mins += slot_duration
-
-        logger.info(f"Found {len([s for s in available_slots if s['available']])} available slots")
+            }
+            for start, end, is_available in zip(starts.tolist(), ends.tolist(), available.tolist())
+        ]
 
         return {
             "date": date_str,
@@ -237,25 +606,66 @@ class CalendlyMockAPI:
         Returns:
             List of available time slots
         """
-        availability = self.get_availability(date_str, appointment_type)
-        available_slots = [slot for slot in availability['available_slots'] if slot['available']]
+        self.reload_if_changed()
+        arrays = self._availability_arrays(date_str, appointment_type)
+        if arrays is None:
+            return []
+        return self._open_slots(arrays, time_preference)
 
-        # Filter by time preference if specified
-        if time_preference and available_slots:
-            filtered_slots = []
-            for slot in available_slots:
-                hour = int(slot['start_time'].split(':')[0])
-
-                if time_preference == "morning" and 6 <= hour < 12:
-                    filtered_slots.append(slot)
-                elif time_preference == "afternoon" and 12 <= hour < 17:
-                    filtered_slots.append(slot)
-                elif time_preference == "evening" and 17 <= hour < 22:
-                    filtered_slots.append(slot)
+    def get_available_slots_bulk(
+        self,
+        date_strs: List[str],
+        appointment_type: str = "consultation",
+        time_preference: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Get only available time slots for several dates at once
 
-            return filtered_slots
+        Args:
+            date_strs: Date strings in format "YYYY-MM-DD"
+            appointment_type: Type of appointment
+            time_preference: Optional time preference ("morning", "afternoon", "evening")
 
-        return available_slots
+        Returns:
+            Dictionary mapping each date string to its list of available slots
+        """
+        self.reload_if_changed()
+        grids: Dict[Tuple[int, int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        slots_by_date: Dict[str, List[Dict]] = {}
+        for date_str in date_strs:
+            if date_str in slots_by_date:
+                continue
+            arrays = self._availability_arrays(date_str, appointment_type, grids)
+            slots_by_date[date_str] = [] if arrays is None else self._open_slots(arrays, time_preference)
+        return slots_by_date
+
+    def _open_slots(
+        self,
+        arrays: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        time_preference: Optional[str]
+    ) -> List[Dict]:
+        """Format the available slots of a day, optionally limited to a time preference"""
+        starts, ends, available = arrays
+
+        # Filter by time preference if specified; starts are sorted, so the
+        # preferred window is one contiguous slice
+        if time_preference:
+            bounds = _TIME_PREFERENCE_MINUTES.get(time_preference)
+            if bounds is None:
+                return []
+            lo, hi = np.searchsorted(starts, bounds, side="left").tolist()
+            starts, ends, available = starts[lo:hi], ends[lo:hi], available[lo:hi]
+
+        # Only the surviving slots are formatted
+        hhmm = self._MIN_TO_HHMM
+        return [
+            {
+                "start_time": hhmm[start],
+                "end_time": hhmm[end],
+                "available": True
+            }
+            for start, end in zip(starts[available].tolist(), ends[available].tolist())
+        ]
 
     def book_appointment(
         self,
@@ -282,7 +692,7 @@ class CalendlyMockAPI:
 
         try:
             check_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            slot_start = self._parse_time(start_time)
+            slot_start_mins = self._parse_minutes(start_time)
         except ValueError as e:
             logger.error(f"Invalid date/time format: {e}")
             return {
@@ -295,42 +705,45 @@ class CalendlyMockAPI:
         # Get duration
         duration = self.appointment_durations.get(appointment_type, 30)
 
-        # Check if slot is available
-        if not self._is_slot_available(check_date, slot_start, duration):
-            logger.warning(f"Slot not available: {date_str} {start_time}")
-            return {
-                "booking_id": None,
-                "status": "failed",
-                "confirmation_code": None,
-                "details": {"error": "Time slot is not available"}
+        with self._locked():
+            # Another process may have booked since our last look
+            self._sync_with_disk()
+
+            # Check if slot is available
+            if not self._is_slot_available(check_date, slot_start_mins, duration):
+                logger.warning(f"Slot not available: {date_str} {start_time}")
+                return {
+                    "booking_id": None,
+                    "status": "failed",
+                    "confirmation_code": None,
+                    "details": {"error": "Time slot is not available"}
+                }
+
+            # Calculate end time
+            slot_end = self._format_minutes(slot_start_mins + duration)
+
+            # Generate booking ID and confirmation code
+            booking_id = f"APPT-{datetime.now().strftime('%Y%m%d')}-{secrets.token_hex(3).upper()}"
+            confirmation_code = secrets.token_hex(4).upper()
+
+            # Create booking
+            booking = {
+                "booking_id": booking_id,
+                "date": date_str,
+                "start_time": start_time,
+                "end_time": slot_end,
+                "type": appointment_type,
+                "patient_name": patient['name'],
+                "patient_email": patient['email'],
+                "patient_phone": patient['phone'],
+                "reason": reason,
+                "status": "confirmed",
+                "confirmation_code": confirmation_code,
+                "created_at": datetime.now(self.timezone).isoformat()
             }
 
-        # Calculate end time
-        end_mins = self._time_to_minutes(slot_start) + duration
-        slot_end = self._minutes_to_time(end_mins)
-
-        # Generate booking ID and confirmation code
-        booking_id = f"APPT-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:6].upper()}"
-        confirmation_code = str(uuid.uuid4())[:8].upper()
-
-        # Create booking
-        booking = {
-            "booking_id": booking_id,
-            "date": date_str,
-            "start_time": start_time,
-            "end_time": slot_end.strftime("%H:%M"),
-            "type": appointment_type,
-            "patient_name": patient['name'],
-            "patient_email": patient['email'],
-            "patient_phone": patient['phone'],
-            "reason": reason,
-            "status": "confirmed",
-            "confirmation_code": confirmation_code,
-            "created_at": datetime.now(self.timezone).isoformat()
-        }
-
-        # Save booking
-        self._save_booking(booking)
+            # Save booking
+            self._save_booking(booking)
 
         logger.info(f"Booking confirmed: {booking_id}")
 
@@ -341,7 +754,7 @@ class CalendlyMockAPI:
             "details": {
                 "date": date_str,
                 "start_time": start_time,
-                "end_time": slot_end.strftime("%H:%M"),
+                "end_time": slot_end,
                 "appointment_type": appointment_type,
                 "duration": duration,
                 "patient": patient,
@@ -351,17 +764,19 @@ class CalendlyMockAPI:
 
     def get_booking(self, booking_id: str) -> Optional[Dict]:
         """Get booking details by ID"""
-        for booking in self.bookings:
-            if booking.get('booking_id') == booking_id:
-                return booking
-        return None
+        self.reload_if_changed()
+        return self._bookings_by_id.get(booking_id)
 
     def cancel_booking(self, booking_id: str) -> bool:
         """Cancel a booking"""
-        for booking in self.bookings:
-            if booking.get('booking_id') == booking_id:
-                booking['status'] = 'cancelled'
-                self._save_booking(booking)
-                logger.info(f"Cancelled booking: {booking_id}")
-                return True
-        return False
+        with self._locked():
+            self._sync_with_disk()
+            booking = self._bookings_by_id.get(booking_id)
+            if booking is None:
+                return False
+
+            self._mark_cancelled(booking)
+            self.bookings_version += 1
+            self._append_log({"op": "cancel", "booking_id": booking_id})
+            logger.info(f"Cancelled booking: {booking_id}")
+            return True
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import logging
+import orjson
 
 from ..models.schemas import ChatRequest, ChatResponse
 from ..agent.scheduling_agent import SchedulingAgent
@@ -37,7 +39,7 @@ async def chat(request: ChatRequest):
     try:
         logger.info(f"Received chat message: {request.message[:50]}...")
 
-        result = agent.chat(
+        result = await agent.chat(
             message=request.message,
             conversation_id=request.conversation_id
         )
@@ -53,6 +55,39 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+
+    Emits one `data:` event per reply text delta, then a final "done" event
+    with the full message, conversation_id and metadata.
+
+    Args:
+        request: Chat request with message and optional conversation_id
+
+    Returns:
+        text/event-stream response
+    """
+    if agent is None:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+
+    logger.info(f"Received streaming chat message: {request.message[:50]}...")
+
+    async def event_stream():
+        try:
+            async for event in agent.stream_chat(
+                message=request.message,
+                conversation_id=request.conversation_id
+            ):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming chat: {str(e)}")
+            yield b"data: " + orjson.dumps({"type": "error", "detail": str(e)}) + b"\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,231 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cached answers go stale along with the clinic data, so keep them an hour
+DEFAULT_CACHE_TTL_SECONDS = 3600
+
+# Cosine similarity above which two questions count as the same question
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with TTL expiry"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of entries kept before the least
+                recently used one is evicted
+            ttl_seconds: Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any):
+        """Store a value and (re)start its expiry timer"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the entry count and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class SemanticResponseCache:
+    """
+    Cache keyed by question text, with a nearest-neighbour fallback
+
+    Lookups first try the normalized question exactly. On a miss the question
+    is embedded and compared against the most recently cached questions, so
+    "What are your hours?" can be answered from "what hours are you open".
+    """
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        max_entries: int = 1024,
+        max_semantic_entries: int = 256,
+        ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            embed: Function returning the embedding of a text. Without one
+                only exact (normalized) matches are served.
+            max_entries: Maximum number of exact-match entries
+            max_semantic_entries: Size of the ring buffer of embedded questions
+            ttl_seconds: Seconds an entry stays valid
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.embed = embed
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._exact = ResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.max_semantic_entries = max_semantic_entries
+
+        # Ring buffer of embedded questions: one contiguous (n, dim) matrix,
+        # so a lookup is a single matrix-vector product. Allocated on the
+        # first add, once the embedding dimension is known.
+        self._vectors: Optional[np.ndarray] = None
+        self._expires = np.zeros(max_semantic_entries, dtype=np.float64)
+        self._values: List[Any] = [None] * max_semantic_entries
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Normalize a question for exact matching"""
+        return " ".join(question.strip().lower().split())
+
+    def get_or_set(self, question: str, compute: Callable[[str], Any]) -> Any:
+        """
+        Return the cached answer for a question, computing and caching it on a miss
+
+        Blocking (embedding and compute run inline); call from a worker thread.
+
+        Args:
+            question: The question text
+            compute: Function producing the answer for the question
+
+        Returns:
+            The cached or freshly computed answer
+        """
+        return self.get_or_set_many([question], lambda questions: [compute(questions[0])])[0]
+
+    def get_or_set_many(self, questions: List[str], compute_many: Callable[[List[str]], List[Any]]) -> List[Any]:
+        """
+        Batched get_or_set: every miss is computed in a single compute_many call
+
+        Args:
+            questions: The question texts
+            compute_many: Function producing the answers for a list of questions, in order
+
+        Returns:
+            One answer per question, in order
+        """
+        values: List[Any] = [None] * len(questions)
+        misses: "OrderedDict[str, Tuple[str, Optional[np.ndarray], List[int]]]" = OrderedDict()
+
+        for idx, question in enumerate(questions):
+            key = self.normalize(question)
+            if key in misses:
+                misses[key][2].append(idx)
+                continue
+
+            value = self._exact.get(key)
+            if value is None:
+                vector = self._embed(key)
+                if vector is not None:
+                    value = self.nearest(vector)
+                    if value is not None:
+                        logger.debug(f"Semantic cache hit for '{question[:50]}'")
+                        self._exact.put(key, value)
+                if value is None:
+                    misses[key] = (question, vector, [idx])
+                    continue
+            values[idx] = value
+
+        if misses:
+            computed = compute_many([question for question, _, _ in misses.values()])
+            for (key, (_, vector, indexes)), value in zip(misses.items(), computed):
+                self._exact.put(key, value)
+                if vector is not None:
+                    self.add(vector, value)
+                for idx in indexes:
+                    values[idx] = value
+
+        return values
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        return self.unit_vector(self.embed(text))
+
+    @staticmethod
+    def unit_vector(vector: Any) -> Optional[np.ndarray]:
+        """Return the vector scaled to unit length, or None for a zero vector"""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def add(self, vector: np.ndarray, value: Any):
+        """Add a value under a unit-length embedding, for lookups by similarity"""
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_semantic_entries, len(vector)), dtype=np.float32)
+            slot = self._next
+            self._vectors[slot] = vector
+            self._expires[slot] = time.monotonic() + self.ttl_seconds
+            self._values[slot] = value
+            self._next = (slot + 1) % self.max_semantic_entries
+            self._size = min(self._size + 1, self.max_semantic_entries)
+
+    def nearest(self, vector: np.ndarray) -> Optional[Any]:
+        """Return the value of the most similar live entry above the threshold"""
+        with self._lock:
+            if not self._size:
+                return None
+            similarities = self._vectors[:self._size] @ vector
+            similarities[self._expires[:self._size] < time.monotonic()] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            return self._values[best]
+
+    def clear(self):
+        """Drop every entry"""
+        self._exact.clear()
+        with self._lock:
+            self._values = [None] * self.max_semantic_entries
+            self._size = 0
+            self._next = 0
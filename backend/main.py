@@ -1,11 +1,14 @@
+import asyncio
 import logging
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
 from .agent.scheduling_agent import SchedulingAgent
+from .agent.conversation_store import InMemoryConversationStore, RedisConversationStore
 from .rag.faq_rag import FAQRAG
 from .api.calendly_integration import CalendlyMockAPI
 from .tools.availability_tool import AvailabilityTool
@@ -32,21 +35,28 @@ async def lifespan(app: FastAPI):
     # Initialize components
     logger.info("Initializing components...")
 
-    # Calendly API
-    calendly_api = CalendlyMockAPI(
-        schedule_path=os.getenv("SCHEDULE_PATH", "./data/doctor_schedule.json")
+    # Calendly API and FAQ RAG are independent and load from disk (the RAG
+    # also loads the embedding model), so build them concurrently in threads
+    calendly_api, faq_rag = await asyncio.gather(
+        asyncio.to_thread(
+            CalendlyMockAPI,
+            schedule_path=os.getenv("SCHEDULE_PATH", "./data/doctor_schedule.json")
+        ),
+        asyncio.to_thread(
+            FAQRAG,
+            data_path=os.getenv("CLINIC_DATA_PATH", "./data/clinic_info.json"),
+            vector_store_path=os.getenv("VECTOR_DB_PATH", "./data/vectordb"),
+            vector_db=os.getenv("VECTOR_DB", "chromadb"),
+            chroma_host=os.getenv("CHROMA_HOST"),
+            chroma_port=int(os.getenv("CHROMA_PORT", "8000")),
+            faiss_quantize=os.getenv("FAISS_QUANTIZE", "false").lower() == "true"
+        )
     )
 
     # Tools
     availability_tool = AvailabilityTool(calendly_api)
     booking_tool = BookingTool(calendly_api)
 
-    # FAQ RAG
-    faq_rag = FAQRAG(
-        data_path=os.getenv("CLINIC_DATA_PATH", "./data/clinic_info.json"),
-        vector_store_path=os.getenv("VECTOR_DB_PATH", "./data/vectordb")
-    )
-
     # Scheduling Agent
     llm_provider = os.getenv("LLM_PROVIDER", "openai")
     llm_model = os.getenv("LLM_MODEL", "gpt-4-turbo")
@@ -58,13 +68,22 @@ async def lifespan(app: FastAPI):
     else:
         raise ValueError(f"Unsupported LLM provider: {llm_provider}")
 
+    # Conversation state: Redis when configured (required for multiple
+    # workers), otherwise in-process memory
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        conversation_store = RedisConversationStore(url=redis_url)
+    else:
+        conversation_store = InMemoryConversationStore()
+
     agent = SchedulingAgent(
         llm_provider=llm_provider,
         llm_model=llm_model,
         api_key=api_key,
         faq_rag=faq_rag,
         availability_tool=availability_tool,
-        booking_tool=booking_tool
+        booking_tool=booking_tool,
+        conversation_store=conversation_store
     )
 
     # Set agent in chat router
@@ -76,6 +95,9 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down...")
+    await agent.aclose()
+    await conversation_store.aclose()
+    await asyncio.to_thread(faq_rag.close)
 
 
 # Create FastAPI app
@@ -83,13 +105,18 @@ app = FastAPI(
     title="Medical Appointment Scheduling Agent",
     description="Intelligent conversational agent for medical appointment scheduling with RAG-based FAQ answering",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
+# CORS middleware, limited to the frontend's origin(s) (comma-separated)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=[
+        origin.strip()
+        for origin in os.getenv("FRONTEND_ORIGIN", "http://localhost:3000").split(",")
+        if origin.strip()
+    ],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
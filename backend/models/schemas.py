@@ -1,11 +1,18 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Literal
+import msgspec
+from pydantic import BaseModel, StringConstraints
+from typing import Annotated, Any, Optional, List, Literal, Type
 from datetime import datetime, date, time
 
+# Shape check for patient emails: one "@" and a dotted domain. Pydantic
+# compiles the pattern once in its Rust core, unlike EmailStr's pure-Python
+# email-validator (which isn't a declared dependency either).
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+Email = Annotated[str, StringConstraints(strip_whitespace=True, pattern=EMAIL_PATTERN)]
+
 
 class PatientInfo(BaseModel):
     name: str
-    email: EmailStr
+    email: Email
     phone: str
     reason: Optional[str] = None
 
@@ -36,10 +43,13 @@ class BookingResponse(BaseModel):
     details: dict
 
 
-class ChatMessage(BaseModel):
+# Internal conversation state is built and (de)serialized on every turn, so
+# it uses msgspec Structs (slotted, no validation on construction) instead
+# of Pydantic models. API request/response bodies stay Pydantic.
+class ChatMessage(msgspec.Struct):
     role: Literal["user", "assistant", "system"]
     content: str
-    timestamp: Optional[datetime] = Field(default_factory=datetime.now)
+    timestamp: Optional[datetime] = msgspec.field(default_factory=datetime.now)
 
 
 class ChatRequest(BaseModel):
@@ -53,7 +63,7 @@ class ChatResponse(BaseModel):
     metadata: Optional[dict] = None
 
 
-class ConversationState(BaseModel):
+class ConversationState(msgspec.Struct):
     conversation_id: str
     phase: Literal["greeting", "understanding_needs", "slot_recommendation", "collecting_info", "confirmation", "faq", "completed"]
     appointment_type: Optional[str] = None
@@ -61,5 +71,27 @@ class ConversationState(BaseModel):
     preferred_time_of_day: Optional[Literal["morning", "afternoon", "evening", "any"]] = None
     selected_slot: Optional[dict] = None
     patient_info: Optional[PatientInfo] = None
-    suggested_slots: List[dict] = []
-    messages: List[ChatMessage] = []
+    suggested_slots: List[dict] = msgspec.field(default_factory=list)
+    messages: List[ChatMessage] = msgspec.field(default_factory=list)
+    # Provider-formatted LLM transcript, including tool calls and results
+    llm_messages: List[dict] = msgspec.field(default_factory=list)
+    # Rolling summary of older turns trimmed from llm_messages
+    summary: Optional[str] = None
+
+
+def _encode_pydantic(obj: Any) -> Any:
+    """msgspec enc_hook for the Pydantic models nested in conversation state"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise NotImplementedError(f"Cannot encode {type(obj).__name__}")
+
+
+def _decode_pydantic(type_: Type, obj: Any) -> Any:
+    """msgspec dec_hook for the Pydantic models nested in conversation state"""
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return type_.model_validate(obj)
+    raise NotImplementedError(f"Cannot decode {type_}")
+
+
+CONVERSATION_STATE_ENCODER = msgspec.json.Encoder(enc_hook=_encode_pydantic)
+CONVERSATION_STATE_DECODER = msgspec.json.Decoder(ConversationState, dec_hook=_decode_pydantic)
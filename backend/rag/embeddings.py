@@ -1,3 +1,4 @@
+from functools import lru_cache
 from sentence_transformers import SentenceTransformer
 from typing import List
 import logging
@@ -5,6 +6,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4)
+def _load(model_name: str) -> SentenceTransformer:
+    """Load a sentence transformer once per process and share it"""
+    logger.info(f"Loading embedding model: {model_name}")
+    return SentenceTransformer(model_name)
+
+
 class EmbeddingModel:
     """Handles text embeddings using sentence transformers"""
 
@@ -15,8 +23,7 @@ class EmbeddingModel:
         Args:
             model_name: Name of the sentence transformer model to use
         """
-        logger.info(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model = _load(model_name)
         self.embedding_dimension = self.model.get_sentence_embedding_dimension()
         logger.info(f"Embedding model loaded. Dimension: {self.embedding_dimension}")
 
@@ -28,9 +35,9 @@ class EmbeddingModel:
             text: Input text to embed
 
         Returns:
-            List of floats representing the embedding vector
+            List of floats representing the unit-length embedding vector
         """
-        embedding = self.model.encode(text, convert_to_tensor=False)
+        embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
         return embedding.tolist()
 
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
@@ -41,7 +48,14 @@ class EmbeddingModel:
             texts: List of texts to embed
 
         Returns:
-            List of embedding vectors
+            List of unit-length embedding vectors
         """
-        embeddings = self.model.encode(texts, convert_to_tensor=False, show_progress_bar=True)
-        return [emb.tolist() for emb in embeddings]
+        embeddings = self.model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        # One bulk conversion of the (n, dim) array instead of a per-row loop
+        return embeddings.tolist()
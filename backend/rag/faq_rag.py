@@ -1,12 +1,19 @@
+import hashlib
 import json
 import logging
-from typing import List, Dict, Optional
+import os
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple
 from pathlib import Path
-from .vector_store import VectorStore
+from .vector_store import FAISSVectorStore, VectorStore
 from .embeddings import EmbeddingModel
 
 logger = logging.getLogger(__name__)
 
+# One retrieved chunk: (content, metadata, distance)
+_Row = Tuple[str, Dict, Optional[float]]
+
 
 class FAQRAG:
     """RAG system for clinic FAQ and information retrieval"""
@@ -14,7 +21,11 @@ class FAQRAG:
     def __init__(
         self,
         data_path: str = "./data/clinic_info.json",
-        vector_store_path: str = "./data/vectordb"
+        vector_store_path: str = "./data/vectordb",
+        vector_db: str = "chromadb",
+        chroma_host: Optional[str] = None,
+        chroma_port: int = 8000,
+        faiss_quantize: bool = False
     ):
         """
         Initialize the FAQ RAG system
@@ -22,132 +33,209 @@ class FAQRAG:
         Args:
             data_path: Path to clinic information JSON file
             vector_store_path: Path to vector database directory
+            vector_db: Vector store backend ("chromadb" or "faiss")
+            chroma_host: Host of a shared Chroma server; when set, ChromaDB is
+                used over HTTP instead of from vector_store_path
+            chroma_port: Port of the Chroma server
+            faiss_quantize: Store FAISS embeddings as 8-bit codes (faiss only)
         """
         self.data_path = data_path
-        self.vector_store = VectorStore(persist_directory=vector_store_path)
         self.embedding_model = EmbeddingModel()
+        if vector_db == "faiss":
+            self.vector_store = FAISSVectorStore(
+                embedding_model=self.embedding_model,
+                persist_directory=vector_store_path,
+                quantize=faiss_quantize
+            )
+        elif vector_db == "chromadb":
+            self.vector_store = VectorStore(
+                persist_directory=vector_store_path,
+                embedding_model=self.embedding_model,
+                mode="http" if chroma_host else "persistent",
+                host=chroma_host or "localhost",
+                port=chroma_port
+            )
+        else:
+            raise ValueError(f"Unsupported vector database: {vector_db}")
+
+        # Users often repeat or re-ask the same question; serve those from a
+        # per-instance LRU keyed on the normalized question instead of
+        # embedding and searching again
+        self._query_cached = lru_cache(maxsize=512)(self._raw_query)
+        self._reload_lock = threading.Lock()
 
         # Load clinic data
         self.clinic_data = self._load_clinic_data()
 
-        # Initialize vector store if empty
-        if self.vector_store.collection.count() == 0:
+        # Initialize the vector store if it is empty, and rebuild it only when
+        # the clinic data has changed since it was indexed
+        self.content_hash = self._content_hash()
+        if self.vector_store.count() == 0:
             logger.info("Vector store is empty. Initializing with clinic data...")
-            self._initialize_vector_store()
+            self._initialize_vector_store(self.content_hash)
+        elif self.vector_store.get_content_hash() != self.content_hash:
+            logger.info("Clinic data changed. Rebuilding vector store...")
+            self.vector_store.reset()
+            self._initialize_vector_store(self.content_hash)
 
     def _load_clinic_data(self) -> Dict:
         """Load clinic information from JSON file"""
         logger.info(f"Loading clinic data from {self.data_path}")
         with open(self.data_path, 'r') as f:
+            self._data_mtime = os.fstat(f.fileno()).st_mtime_ns
             data = json.load(f)
         return data
 
-    def _initialize_vector_store(self):
-        """Initialize vector store with clinic information"""
-        documents = []
-        metadatas = []
-        ids = []
+    def reload_if_changed(self) -> bool:
+        """
+        Re-index the clinic data if its file changed on disk since it was read
 
-        # Add clinic details
-        clinic_details = self.clinic_data.get("clinic_details", {})
+        One stat() call when nothing changed. The vector store is rebuilt
+        only when the content hash differs, and content_hash is updated
+        afterwards, so callers can drop anything cached from the old content.
 
-        # Location and directions
-        documents.append(
-            f"Clinic Location: {clinic_details.get('address', '')}. "
-            f"Directions: {clinic_details.get('location_and_directions', '')}"
-        )
-        metadatas.append({"category": "location", "type": "clinic_details"})
-        ids.append("clinic_location")
-
-        # Parking information
-        documents.append(f"Parking Information: {clinic_details.get('parking_information', '')}")
-        metadatas.append({"category": "parking", "type": "clinic_details"})
-        ids.append("clinic_parking")
-
-        # Hours of operation
-        hours = clinic_details.get('hours_of_operation', {})
-        hours_text = "Clinic Hours of Operation: " + ", ".join([
-            f"{day.capitalize()}: {time}" for day, time in hours.items()
-        ])
-        documents.append(hours_text)
-        metadatas.append({"category": "hours", "type": "clinic_details"})
-        ids.append("clinic_hours")
-
-        # Insurance and billing
+        Returns:
+            True if the knowledge base was rebuilt
+        """
+        try:
+            mtime = os.stat(self.data_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._data_mtime:
+            return False
+
+        with self._reload_lock:
+            if os.stat(self.data_path).st_mtime_ns == self._data_mtime:
+                return False
+            self.clinic_data = self._load_clinic_data()
+            content_hash = self._content_hash()
+            if content_hash == self.content_hash:
+                return False
+
+            logger.info(f"{self.data_path} changed on disk; rebuilding vector store")
+            self.vector_store.reset()
+            self._initialize_vector_store(content_hash)
+            self.clear_cache()
+            self.content_hash = content_hash
+            return True
+
+    def _content_hash(self) -> str:
+        """Hash of the clinic data, used to tell whether the vector store is current"""
+        return hashlib.sha256(json.dumps(self.clinic_data, sort_keys=True).encode()).hexdigest()
+
+    def _build_documents(self) -> Tuple[List[str], List[Dict], List[str]]:
+        """Build the documents, metadatas and ids indexed for the clinic data"""
+        clinic_details = self.clinic_data.get("clinic_details", {})
         insurance = self.clinic_data.get("insurance_and_billing", {})
-
-        accepted_insurance = ", ".join(insurance.get("accepted_insurance", []))
-        documents.append(f"Accepted Insurance Providers: {accepted_insurance}")
-        metadatas.append({"category": "insurance", "type": "billing"})
-        ids.append("accepted_insurance")
-
-        payment_methods = ", ".join(insurance.get("payment_methods", []))
-        documents.append(f"Payment Methods: {payment_methods}")
-        metadatas.append({"category": "payment", "type": "billing"})
-        ids.append("payment_methods")
-
-        documents.append(f"Billing Policies: {insurance.get('billing_policies', '')}")
-        metadatas.append({"category": "billing", "type": "billing"})
-        ids.append("billing_policies")
-
-        # Visit preparation
         visit_prep = self.clinic_data.get("visit_preparation", {})
-
-        required_docs = ", ".join(visit_prep.get("required_documents", []))
-        documents.append(f"Required Documents for Visit: {required_docs}")
-        metadatas.append({"category": "preparation", "type": "visit_prep"})
-        ids.append("required_documents")
-
-        documents.append(f"First Visit Procedures: {visit_prep.get('first_visit_procedures', '')}")
-        metadatas.append({"category": "preparation", "type": "visit_prep"})
-        ids.append("first_visit_procedures")
-
-        what_to_bring = ", ".join(visit_prep.get("what_to_bring", []))
-        documents.append(f"What to Bring to Appointment: {what_to_bring}")
-        metadatas.append({"category": "preparation", "type": "visit_prep"})
-        ids.append("what_to_bring")
-
-        # Policies
         policies = self.clinic_data.get("policies", {})
 
-        documents.append(f"Cancellation Policy: {policies.get('cancellation_policy', '')}")
-        metadatas.append({"category": "policy", "type": "policies"})
-        ids.append("cancellation_policy")
-
-        documents.append(f"Late Arrival Policy: {policies.get('late_arrival_policy', '')}")
-        metadatas.append({"category": "policy", "type": "policies"})
-        ids.append("late_arrival_policy")
-
-        documents.append(f"COVID-19 Protocols: {policies.get('covid_19_protocols', '')}")
-        metadatas.append({"category": "policy", "type": "policies"})
-        ids.append("covid_protocols")
+        # (id, category, type, document text) for each fixed clinic document
+        spec = [
+            (
+                "clinic_location", "location", "clinic_details",
+                f"Clinic Location: {clinic_details.get('address', '')}. "
+                f"Directions: {clinic_details.get('location_and_directions', '')}"
+            ),
+            (
+                "clinic_parking", "parking", "clinic_details",
+                f"Parking Information: {clinic_details.get('parking_information', '')}"
+            ),
+            (
+                "clinic_hours", "hours", "clinic_details",
+                "Clinic Hours of Operation: " + ", ".join([
+                    f"{day.capitalize()}: {time}"
+                    for day, time in clinic_details.get('hours_of_operation', {}).items()
+                ])
+            ),
+            (
+                "accepted_insurance", "insurance", "billing",
+                f"Accepted Insurance Providers: {', '.join(insurance.get('accepted_insurance', []))}"
+            ),
+            (
+                "payment_methods", "payment", "billing",
+                f"Payment Methods: {', '.join(insurance.get('payment_methods', []))}"
+            ),
+            (
+                "billing_policies", "billing", "billing",
+                f"Billing Policies: {insurance.get('billing_policies', '')}"
+            ),
+            (
+                "required_documents", "preparation", "visit_prep",
+                f"Required Documents for Visit: {', '.join(visit_prep.get('required_documents', []))}"
+            ),
+            (
+                "first_visit_procedures", "preparation", "visit_prep",
+                f"First Visit Procedures: {visit_prep.get('first_visit_procedures', '')}"
+            ),
+            (
+                "what_to_bring", "preparation", "visit_prep",
+                f"What to Bring to Appointment: {', '.join(visit_prep.get('what_to_bring', []))}"
+            ),
+            (
+                "cancellation_policy", "policy", "policies",
+                f"Cancellation Policy: {policies.get('cancellation_policy', '')}"
+            ),
+            (
+                "late_arrival_policy", "policy", "policies",
+                f"Late Arrival Policy: {policies.get('late_arrival_policy', '')}"
+            ),
+            (
+                "covid_protocols", "policy", "policies",
+                f"COVID-19 Protocols: {policies.get('covid_19_protocols', '')}"
+            ),
+        ]
+
+        documents = [text for _, _, _, text in spec]
+        metadatas = [{"category": category, "type": doc_type} for _, category, doc_type, _ in spec]
+        ids = [doc_id for doc_id, _, _, _ in spec]
 
         # Appointment types
-        apt_types = self.clinic_data.get("appointment_types", {})
-        for apt_name, apt_info in apt_types.items():
-            doc_text = (
+        for apt_name, apt_info in self.clinic_data.get("appointment_types", {}).items():
+            documents.append(
                 f"{apt_info.get('description', '')} "
                 f"Duration: {apt_info.get('duration')} minutes. "
                 f"Preparation: {apt_info.get('preparation', '')}"
             )
-            documents.append(doc_text)
             metadatas.append({"category": "appointment_type", "type": apt_name})
             ids.append(f"apt_type_{apt_name}")
 
         # FAQs
-        faqs = self.clinic_data.get("faqs", [])
-        for idx, faq in enumerate(faqs):
-            doc_text = f"Q: {faq.get('question', '')} A: {faq.get('answer', '')}"
-            documents.append(doc_text)
+        for idx, faq in enumerate(self.clinic_data.get("faqs", [])):
+            documents.append(f"Q: {faq.get('question', '')} A: {faq.get('answer', '')}")
             metadatas.append({"category": "faq", "type": "faq", "question": faq.get('question', '')})
             ids.append(f"faq_{idx}")
 
-        # Add all documents to vector store
+        return documents, metadatas, ids
+
+    def _initialize_vector_store(self, content_hash: str):
+        """Initialize vector store with clinic information"""
+        documents, metadatas, ids = self._build_documents()
+
+        # Chroma rejects the whole add if any ID repeats; keep the first
+        # document for each ID rather than failing initialization
+        seen = set()
+        unique = []
+        for idx, doc_id in enumerate(ids):
+            if doc_id in seen:
+                logger.warning(f"Skipping duplicate document id: {doc_id}")
+                continue
+            seen.add(doc_id)
+            unique.append(idx)
+        if len(unique) < len(ids):
+            documents = [documents[idx] for idx in unique]
+            metadatas = [metadatas[idx] for idx in unique]
+            ids = [ids[idx] for idx in unique]
+
+        # Add all documents to vector store (embedded in one batch by its
+        # model). A failed write raises here, before the content hash would
+        # mark the store as current.
         self.vector_store.add_documents(
             documents=documents,
             metadatas=metadatas,
             ids=ids
-        )
+        ).result()
+        self.vector_store.set_content_hash(content_hash)
         logger.info(f"Initialized vector store with {len(documents)} documents")
 
     def query(self, question: str, n_results: int = 3) -> List[Dict]:
@@ -162,24 +250,62 @@ class FAQRAG:
             List of relevant information chunks with metadata
         """
         logger.info(f"Querying FAQ: '{question}'")
-
-        results = self.vector_store.query(
-            query_text=question,
-            n_results=n_results
+        return self._rows_to_chunks(self._query_cached(self._normalize(question), n_results))
+
+    @staticmethod
+    def _normalize(question: str) -> str:
+        """Normalize a question for use as a cache key"""
+        return " ".join(question.strip().lower().split())
+
+    def _raw_query(self, question: str, n_results: int) -> Tuple[_Row, ...]:
+        """Retrieve (content, metadata, distance) rows for one question"""
+        return tuple(
+            (hit.doc, hit.meta, hit.distance)
+            for hit in self.vector_store.query_iter(query_text=question, n_results=n_results)
         )
 
-        # Format results
-        formatted_results = []
-        if results and results['documents'] and len(results['documents']) > 0:
-            for i in range(len(results['documents'][0])):
-                formatted_results.append({
-                    "content": results['documents'][0][i],
-                    "metadata": results['metadatas'][0][i] if results['metadatas'] else {},
-                    "distance": results['distances'][0][i] if results['distances'] else None
-                })
+    def clear_cache(self):
+        """Drop cached query results, e.g. after the knowledge base changes"""
+        self._query_cached.cache_clear()
+
+    def close(self):
+        """Finish pending vector store writes and release the store"""
+        self.vector_store.close()
 
-        logger.debug(f"Found {len(formatted_results)} relevant documents")
-        return formatted_results
+    def query_batch(self, questions: List[str], n_results: int = 3) -> List[List[Dict]]:
+        """
+        Query the FAQ system for several questions in one retrieval
+
+        Args:
+            questions: User questions
+            n_results: Number of relevant documents to retrieve per question
+
+        Returns:
+            One list of relevant information chunks per question, in order
+        """
+        logger.info(f"Querying FAQ with {len(questions)} questions")
+        return [self._rows_to_chunks(rows) for rows in self._query_batch_rows(questions, n_results)]
+
+    def _query_batch_rows(self, questions: List[str], n_results: int) -> List[List[_Row]]:
+        """Retrieve (content, metadata, distance) rows for several questions in one call"""
+        rows = []
+        for hits in self.vector_store.query_batch_hits(query_texts=questions, n_results=n_results):
+            rows.append([(hit.doc, hit.meta, hit.distance) for hit in hits])
+            logger.debug(f"Found {len(rows[-1])} relevant documents")
+        return rows
+
+    @staticmethod
+    def _rows_to_chunks(rows: Sequence[_Row]) -> List[Dict]:
+        """
+        Build the chunk dicts returned by query() from result rows
+
+        Each chunk gets its own copy of the metadata, which the rows share
+        with the query caches, so callers can't mutate cached results.
+        """
+        return [
+            {"content": content, "metadata": dict(metadata), "distance": distance}
+            for content, metadata, distance in rows
+        ]
 
     def get_context_for_question(self, question: str, n_results: int = 3) -> str:
         """
@@ -192,13 +318,27 @@ class FAQRAG:
         Returns:
             Formatted context string to include in LLM prompt
         """
-        results = self.query(question, n_results=n_results)
+        return self._format_context(self._query_cached(self._normalize(question), n_results))
 
-        if not results:
-            return "No relevant information found in the knowledge base."
+    def get_contexts_for_questions(self, questions: List[str], n_results: int = 3) -> List[str]:
+        """
+        Get formatted context strings for several questions with one retrieval
 
-        context_parts = []
-        for idx, result in enumerate(results, 1):
-            context_parts.append(f"[Source {idx}] {result['content']}")
+        Args:
+            questions: User questions
+            n_results: Number of relevant documents to retrieve per question
+
+        Returns:
+            One context string per question, in order
+        """
+        if not questions:
+            return []
+        logger.info(f"Querying FAQ with {len(questions)} questions")
+        return [self._format_context(rows) for rows in self._query_batch_rows(questions, n_results)]
+
+    def _format_context(self, rows: Sequence[_Row]) -> str:
+        """Format retrieved (content, metadata, distance) rows as a context string for the LLM prompt"""
+        if not rows:
+            return "No relevant information found in the knowledge base."
 
-        return "\n\n".join(context_parts)
+        return "\n\n".join(f"[Source {idx}] {content}" for idx, (content, _, _) in enumerate(rows, 1))
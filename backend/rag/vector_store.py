@@ -1,92 +1,860 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from chromadb.errors import DuplicateIDError, IDAlreadyExistsError
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Iterator, List, Dict, Literal, NamedTuple, Optional, Tuple
+import atexit
+import json
 import logging
 import os
+import threading
+import time
+
+import numpy as np
+import orjson
+
+from ..cache import ResponseCache, SemanticResponseCache
+from .embeddings import EmbeddingModel
 
 logger = logging.getLogger(__name__)
 
+# Chroma serves queries from an HNSW graph index (approximate nearest
+# neighbours, sub-linear in corpus size); these metadata keys tune it.
+# Chroma's default search_ef of 10 leaves little headroom over n_results, so
+# it is raised to keep recall high as the knowledge base grows. The index
+# parameters are fixed when a collection is created: an existing collection
+# keeps its own until the store is reset.
+_COLLECTION_METADATA = {
+    "description": "Clinic information and FAQs",
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64
+}
+
+# Query results are cached briefly per (query, n_results, filter); any write
+# to the collection clears the cache
+QUERY_CACHE_SIZE = 512
+QUERY_CACHE_TTL_SECONDS = 300
+
+# Embedded queries kept per (n_results, filter) for paraphrase lookups
+SEMANTIC_CACHE_SIZE = 1024
+
+
+class QueryHit(NamedTuple):
+    """One search result"""
+    doc: str
+    meta: Dict
+    distance: Optional[float]
+    id: Optional[str]
+
+
+def _hits_from_columns(results: Dict, row: int = 0) -> Tuple[QueryHit, ...]:
+    """
+    Build the hits of one query straight from Chroma's result columns
+
+    Args:
+        results: Raw collection.query result, with one list per query in
+            each of its ids, documents, metadatas and distances columns
+        row: Index of the query within the result
+
+    Returns:
+        QueryHit per document, in rank order
+    """
+    ids = results["ids"][row]
+    documents = results["documents"][row] if results.get("documents") else [""] * len(ids)
+    metadatas = results["metadatas"][row] if results.get("metadatas") else [{}] * len(ids)
+    distances = results["distances"][row] if results.get("distances") else [None] * len(ids)
+    return tuple(map(QueryHit, documents, metadatas, distances, ids))
+
+
+def _hits_to_results(rows: List[Tuple[QueryHit, ...]]) -> Dict:
+    """Lay out the hits of several queries as a Chroma-shaped result dict"""
+    return {
+        "ids": [[hit.id for hit in hits] for hits in rows],
+        "documents": [[hit.doc for hit in hits] for hits in rows],
+        "metadatas": [[hit.meta for hit in hits] for hits in rows],
+        "distances": [[hit.distance for hit in hits] for hits in rows]
+    }
+
+
+def mmr_select(query_vector: np.ndarray, candidates: np.ndarray, k: int, lambda_: float = 0.5) -> List[int]:
+    """
+    Pick k candidates by Maximal Marginal Relevance
+
+    Each pick maximizes lambda_ * similarity to the query minus
+    (1 - lambda_) * the highest similarity to anything already picked, so
+    near-duplicates of earlier picks are pushed down the list.
+
+    Args:
+        query_vector: Query embedding, shape (dim,)
+        candidates: Candidate embeddings, shape (n, dim)
+        k: Number of candidates to pick
+        lambda_: Trade-off between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Indexes of the picked candidates, in pick order
+    """
+    if not len(candidates):
+        return []
+    candidates = np.ascontiguousarray(candidates, dtype=np.float32)
+    norms = np.linalg.norm(candidates, axis=1, keepdims=True)
+    candidates = candidates / np.where(norms > 0, norms, 1)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    query_vector = query_vector / (np.linalg.norm(query_vector) or 1)
+
+    # Both similarity tables are computed once up front
+    sim_to_query = candidates @ query_vector
+    sim_pairs = candidates @ candidates.T
+
+    k = min(k, len(candidates))
+    selected: List[int] = []
+    # Highest similarity of each candidate to the picks so far
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    for _ in range(k):
+        scores = lambda_ * sim_to_query - (1 - lambda_) * redundancy if selected else sim_to_query.copy()
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, sim_pairs[best], out=redundancy)
+    return selected
+
 
 class VectorStore:
     """Manages vector storage and retrieval using ChromaDB"""
 
-    def __init__(self, persist_directory: str = "./data/vectordb"):
+    def __init__(
+        self,
+        persist_directory: str = "./data/vectordb",
+        embedding_model: Optional[EmbeddingModel] = None,
+        semantic_threshold: Optional[float] = None,
+        mode: Literal["persistent", "http"] = "persistent",
+        host: str = "localhost",
+        port: int = 8000
+    ):
         """
         Initialize ChromaDB vector store
 
         Args:
             persist_directory: Directory to persist the vector database
+                (persistent mode only)
+            embedding_model: Model used to embed documents and queries in
+                batches before they reach Chroma. Without one Chroma embeds
+                them with its default embedding function.
+            semantic_threshold: Cosine similarity above which a query reuses
+                the cached results of an earlier, similar query (needs an
+                embedding model, e.g. 0.95); None, the default, serves only
+                exact repeats from the cache
+            mode: "persistent" keeps the index in this process; "http"
+                connects to a shared Chroma server, which holds the HNSW
+                index once for every API replica
+            host: Chroma server host (http mode only)
+            port: Chroma server port (http mode only)
         """
         self.persist_directory = persist_directory
-        os.makedirs(persist_directory, exist_ok=True)
+        self.embedding_model = embedding_model
+        self.semantic_threshold = semantic_threshold
+        self._cache = ResponseCache(max_entries=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+        self._semantic_caches: Dict[Tuple, SemanticResponseCache] = {}
 
-        logger.info(f"Initializing ChromaDB at {persist_directory}")
-        self.client = chromadb.PersistentClient(path=persist_directory)
+        # Writes run on a single background thread, so they reach the
+        # collection in the order they were queued; reads flush them first
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-store-writer")
+        self._pending: List[Future] = []
+        self._pending_lock = threading.Lock()
+        atexit.register(self.flush)
 
-        # Create or get collection for clinic FAQs
-        self.collection = self.client.get_or_create_collection(
-            name="clinic_faq",
-            metadata={"description": "Clinic information and FAQs"}
-        )
+        if mode == "http":
+            logger.info(f"Connecting to ChromaDB server at {host}:{port}")
+            self.client = chromadb.HttpClient(host=host, port=port)
+        elif mode == "persistent":
+            os.makedirs(persist_directory, exist_ok=True)
+            logger.info(f"Initializing ChromaDB at {persist_directory}")
+            self.client = chromadb.PersistentClient(path=persist_directory)
+        else:
+            raise ValueError(f"Unsupported ChromaDB mode: {mode}")
+
+        # Get or create collection for clinic FAQs. An existing collection is
+        # opened as-is: get_or_create_collection would overwrite its metadata,
+        # including the recorded content hash.
+        if any(collection.name == "clinic_faq" for collection in self.client.list_collections()):
+            self.collection = self.client.get_collection(name="clinic_faq")
+        else:
+            self.collection = self.client.create_collection(
+                name="clinic_faq",
+                metadata=_COLLECTION_METADATA
+            )
         logger.info(f"Collection 'clinic_faq' initialized with {self.collection.count()} documents")
+        self._warmup()
+
+    def _warmup(self):
+        """
+        Run one throwaway search so the HNSW index is loaded before the first real query
+
+        Chroma loads a persisted index lazily; without this the first user
+        question pays for reading it. The query vector is a stored embedding,
+        so nothing needs to be embedded. Never raises.
+        """
+        try:
+            if self.collection.count() == 0:
+                return
+            started = time.perf_counter()
+            sample = self.collection.get(limit=1, include=["embeddings"])
+            self.collection.query(query_embeddings=sample["embeddings"], n_results=1, include=[])
+            logger.info(f"Vector index warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            logger.warning(f"Vector index warmup failed: {str(e)}")
 
     def add_documents(
         self,
         documents: List[str],
         metadatas: List[Dict],
-        ids: List[str]
-    ):
+        ids: List[str],
+        embeddings: Optional[List[List[float]]] = None,
+        batch_size: int = 128
+    ) -> Future:
         """
-        Add documents to the vector store
+        Queue documents to be added to the vector store
+
+        The documents are embedded and written on the background writer
+        thread and this returns immediately; queries, count() and later
+        metadata changes wait for queued writes, and flush() waits
+        explicitly. A failed write raises from the returned Future only.
+        Documents are written in batches of batch_size, which keeps large
+        ingests from becoming one huge transaction while amortizing the
+        per-call overhead.
 
         Args:
             documents: List of text documents
             metadatas: List of metadata dictionaries
             ids: List of unique document IDs
+            embeddings: Optional precomputed embeddings, one per document.
+                Without them Chroma embeds the documents itself.
+            batch_size: Number of documents per collection.add call
+
+        Returns:
+            Future that completes once the documents are written, or raises
+            the error that stopped the write
         """
-        logger.info(f"Adding {len(documents)} documents to vector store")
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+        logger.info(f"Queueing {len(documents)} documents for the vector store")
+        self.clear_cache()
+        future = self._writer.submit(self._write_documents, documents, metadatas, ids, embeddings, batch_size)
+        with self._pending_lock:
+            self._pending.append(future)
+        return future
+
+    def _write_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]],
+        batch_size: int
+    ):
+        """Embed and add documents to the collection (runs on the writer thread)"""
+        started = time.perf_counter()
+
+        if embeddings is None and self.embedding_model is not None:
+            embeddings = self.embedding_model.embed_texts(documents)
+
+        num_batches = 0
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            batch = {
+                "documents": documents[start:end],
+                "metadatas": metadatas[start:end],
+                "ids": ids[start:end],
+                "embeddings": embeddings[start:end] if embeddings is not None else None
+            }
+            num_batches += 1
+            try:
+                self.collection.add(**batch)
+            except (DuplicateIDError, IDAlreadyExistsError) as e:
+                # One bad ID fails the whole batch; add the rest one by one
+                logger.warning(f"Batch starting at {start} rejected ({str(e)}); adding documents individually")
+                self._add_individually(batch)
+
+        # Queries that ran while the write was in flight may have cached
+        # results from before it
+        self.clear_cache()
+
+        elapsed = time.perf_counter() - started
+        rate = len(documents) / elapsed if elapsed > 0 else float("inf")
+        logger.info(
+            f"Successfully added documents in {num_batches} batches ({rate:.0f} docs/s). "
+            f"Total count: {self.collection.count()}"
         )
-        logger.info(f"Successfully added documents. Total count: {self.collection.count()}")
+
+    def flush(self, timeout: Optional[float] = None):
+        """
+        Wait for every queued write to reach the collection
+
+        Args:
+            timeout: Maximum seconds to wait; None waits indefinitely
+
+        Failed writes are logged here but not raised; their errors belong to
+        the Futures add_documents returned.
+
+        Raises:
+            TimeoutError: If writes are still pending after timeout
+        """
+        with self._pending_lock:
+            pending = list(self._pending)
+        if not pending:
+            return
+
+        done, not_done = wait(pending, timeout=timeout)
+        with self._pending_lock:
+            finished = [future for future in self._pending if future in done]
+            self._pending = [future for future in self._pending if future not in done]
+
+        # Each failed write is logged once, by the flush that collects it
+        for future in finished:
+            error = future.exception()
+            if error is not None:
+                logger.error(f"Background vector store write failed: {str(error)}")
+        if not_done:
+            raise TimeoutError(f"{len(not_done)} vector store writes still pending after {timeout}s")
+
+    def close(self):
+        """Wait for queued writes, then stop the writer thread"""
+        self.flush()
+        self._writer.shutdown(wait=True)
+        atexit.unregister(self.flush)
+
+    def _add_individually(self, batch: Dict[str, Optional[List]]):
+        """Add a rejected batch document by document, skipping the ones that fail"""
+        for idx, doc_id in enumerate(batch["ids"]):
+            try:
+                self.collection.add(**{
+                    key: values[idx:idx + 1] if values is not None else None
+                    for key, values in batch.items()
+                })
+            except (DuplicateIDError, IDAlreadyExistsError) as e:
+                logger.warning(f"Skipping document {doc_id}: {str(e)}")
 
     def query(
         self,
         query_text: str,
         n_results: int = 3,
-        where: Optional[Dict] = None
+        where: Optional[Dict] = None,
+        use_mmr: bool = False,
+        lambda_: float = 0.5
     ) -> Dict:
         """
         Query the vector store for similar documents
 
+        Same arguments as query_iter(), with the hits laid out as Chroma's
+        nested lists.
+
+        Returns:
+            Dictionary with query results containing documents, metadatas, and distances
+        """
+        return _hits_to_results([tuple(self.query_iter(query_text, n_results, where, use_mmr, lambda_))])
+
+    def query_iter(
+        self,
+        query_text: str,
+        n_results: int = 3,
+        where: Optional[Dict] = None,
+        use_mmr: bool = False,
+        lambda_: float = 0.5
+    ) -> Iterator[QueryHit]:
+        """
+        Query the vector store and iterate over the hits
+
         Args:
             query_text: Query text to search for
             n_results: Number of results to return
             where: Optional metadata filter
+            use_mmr: Re-rank a wider candidate set with Maximal Marginal
+                Relevance, trading some similarity for less redundant results
+                (needs an embedding model)
+            lambda_: MMR trade-off between relevance (1.0) and diversity (0.0)
 
         Returns:
-            Dictionary with query results containing documents, metadatas, and distances
+            Iterator of QueryHit(doc, meta, distance, id), in rank order
         """
         logger.debug(f"Querying vector store: '{query_text[:50]}...'")
+        if use_mmr:
+            return iter(self._query_mmr(query_text, n_results, where, lambda_))
+        return iter(self.query_batch_hits([query_text], n_results=n_results, where=where)[0])
+
+    def _query_mmr(self, query_text: str, n_results: int, where: Optional[Dict], lambda_: float) -> Tuple[QueryHit, ...]:
+        """Fetch extra candidates with their embeddings and keep the MMR picks"""
+        if self.embedding_model is None:
+            raise ValueError("MMR re-ranking requires a vector store embedding model")
+        self.flush()
+
+        key = self._cache_key(query_text, n_results, self._filter_key(where)) + ("mmr", lambda_)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        query_embedding = self.embedding_model.embed_texts([query_text])[0]
         results = self.collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            where=where
+            query_embeddings=[query_embedding],
+            n_results=max(20, 4 * n_results),
+            include=["embeddings", "documents", "metadatas", "distances"],
+            **self._filter_args(where)
         )
-        return results
+
+        candidates = results["embeddings"][0] if results.get("embeddings") else []
+        selected = mmr_select(np.asarray(query_embedding), np.asarray(candidates), n_results, lambda_)
+        hits = _hits_from_columns(results)
+        reranked = tuple(hits[idx] for idx in selected)
+        self._cache.put(key, reranked)
+        return reranked
+
+    def query_batch(
+        self,
+        query_texts: List[str],
+        n_results: int = 3,
+        where: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Query the vector store for several texts at once
+
+        Same arguments as query_batch_hits(), with the hits laid out as
+        Chroma's nested lists.
+
+        Returns:
+            Dictionary with one list of documents, metadatas and distances per query
+        """
+        return _hits_to_results(self.query_batch_hits(query_texts, n_results=n_results, where=where))
+
+    def query_batch_hits(
+        self,
+        query_texts: List[str],
+        n_results: int = 3,
+        where: Optional[Dict] = None
+    ) -> List[Tuple[QueryHit, ...]]:
+        """
+        Query the vector store for several texts at once
+
+        Cached results are served without searching. The remaining query
+        texts are embedded in a single batch; with a semantic threshold set,
+        those close enough to an earlier query reuse its results, and the
+        rest are searched in one collection call.
+
+        Args:
+            query_texts: Query texts to search for
+            n_results: Number of results to return per query
+            where: Optional metadata filter
+
+        Returns:
+            One tuple of QueryHit per query, in order
+        """
+        logger.debug(f"Querying vector store with {len(query_texts)} texts")
+        self.flush()
+        # The filter is serialized once for the whole batch
+        filter_key = self._filter_key(where)
+        keys = [self._cache_key(text, n_results, filter_key) for text in query_texts]
+        per_query: List[Optional[Tuple[QueryHit, ...]]] = [self._cache.get(key) for key in keys]
+
+        misses: Dict[Tuple, List[int]] = {}
+        for idx, (key, cached) in enumerate(zip(keys, per_query)):
+            if cached is None:
+                misses.setdefault(key, []).append(idx)
+
+        if misses:
+            miss_keys = list(misses)
+            miss_texts = [query_texts[misses[key][0]] for key in miss_keys]
+            semantic_cache = self._semantic_cache(n_results, filter_key)
+
+            if self.embedding_model is not None:
+                vectors = [
+                    SemanticResponseCache.unit_vector(vector)
+                    for vector in self.embedding_model.embed_texts(miss_texts)
+                ]
+                if semantic_cache is not None:
+                    for pos, key in enumerate(miss_keys):
+                        if vectors[pos] is None:
+                            continue
+                        similar = semantic_cache.nearest(vectors[pos])
+                        if similar is not None:
+                            logger.debug(f"Semantic query cache hit for '{miss_texts[pos][:50]}'")
+                            self._resolve(key, similar, misses, per_query)
+                    unresolved = [pos for pos, key in enumerate(miss_keys) if per_query[misses[key][0]] is None]
+                else:
+                    unresolved = list(range(len(miss_keys)))
+                query_input = {"query_embeddings": [vectors[pos].tolist() for pos in unresolved]}
+            else:
+                vectors = None
+                unresolved = list(range(len(miss_keys)))
+                query_input = {"query_texts": miss_texts}
+
+            if unresolved:
+                results = self.collection.query(**query_input, n_results=n_results, **self._filter_args(where))
+                for row, pos in enumerate(unresolved):
+                    hits = _hits_from_columns(results, row)
+                    self._resolve(miss_keys[pos], hits, misses, per_query)
+                    if semantic_cache is not None and vectors is not None:
+                        semantic_cache.add(vectors[pos], hits)
+
+        return per_query
+
+    @staticmethod
+    def _filter_key(where: Optional[Dict]) -> Optional[bytes]:
+        """Canonical form of a metadata filter for cache keys; None when unfiltered"""
+        return orjson.dumps(where, option=orjson.OPT_SORT_KEYS) if where else None
+
+    @staticmethod
+    def _filter_args(where: Optional[Dict]) -> Dict:
+        """Filter keyword arguments for collection.query; none for an unfiltered query"""
+        return {"where": where} if where else {}
+
+    @staticmethod
+    def _cache_key(query_text: str, n_results: int, filter_key: Optional[bytes]) -> Tuple:
+        """Query cache key: normalized text, result count and canonical filter"""
+        return (" ".join(query_text.strip().lower().split()), n_results, filter_key)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return the query cache size and hit/miss counters"""
+        return self._cache.stats()
+
+    def _resolve(
+        self,
+        key: Tuple,
+        result: Tuple[QueryHit, ...],
+        misses: Dict[Tuple, List[int]],
+        per_query: List[Optional[Tuple[QueryHit, ...]]]
+    ):
+        """Cache the hits for a missed query and fill in every position that asked for it"""
+        self._cache.put(key, result)
+        for idx in misses[key]:
+            per_query[idx] = result
+
+    def _semantic_cache(self, n_results: int, filter_key: Optional[bytes]) -> Optional[SemanticResponseCache]:
+        """The semantic cache for queries with these parameters, if enabled"""
+        if self.embedding_model is None or self.semantic_threshold is None:
+            return None
+        params = (n_results, filter_key)
+        cache = self._semantic_caches.get(params)
+        if cache is None:
+            cache = self._semantic_caches.setdefault(params, SemanticResponseCache(
+                max_semantic_entries=SEMANTIC_CACHE_SIZE,
+                ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+                similarity_threshold=self.semantic_threshold
+            ))
+        return cache
+
+    def clear_semantic_cache(self):
+        """Drop the embedded queries used for similarity lookups"""
+        self._semantic_caches.clear()
+
+    def clear_cache(self):
+        """Drop all cached query results"""
+        self._cache.clear()
+        self.clear_semantic_cache()
+
+    def count(self) -> int:
+        """Return the number of documents in the collection"""
+        self.flush()
+        return self.collection.count()
+
+    def get_content_hash(self) -> Optional[str]:
+        """Return the hash of the source data the collection was built from, if recorded"""
+        self.flush()
+        return (self.collection.metadata or {}).get("content_hash")
+
+    def set_content_hash(self, content_hash: str):
+        """
+        Record the hash of the source data the collection was built from
+
+        Args:
+            content_hash: Hash of the indexed source data
+        """
+        # Recorded only once the documents it describes are written
+        self.flush()
+        self.collection.modify(metadata={**_COLLECTION_METADATA, "content_hash": content_hash})
 
     def delete_collection(self):
         """Delete the entire collection"""
         logger.warning("Deleting collection 'clinic_faq'")
+        self.flush()
         self.client.delete_collection(name="clinic_faq")
+        self.clear_cache()
 
     def reset(self):
         """Reset the vector store by deleting and recreating the collection"""
         self.delete_collection()
         self.collection = self.client.get_or_create_collection(
             name="clinic_faq",
-            metadata={"description": "Clinic information and FAQs"}
+            metadata=_COLLECTION_METADATA
         )
         logger.info("Vector store reset complete")
+
+
+class FAISSVectorStore:
+    """
+    In-memory exact vector search with FAISS
+
+    For a corpus of a few hundred documents, a flat inner-product scan over
+    normalized embeddings is exact and sub-millisecond, without Chroma's
+    per-query HNSW and SQLite overhead. With quantize=True the scan runs over
+    int8 codes instead, for larger corpora where memory is the limit. Same
+    interface as VectorStore; the index and documents are saved to
+    persist_directory after every write.
+    """
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        persist_directory: str = "./data/vectordb",
+        quantize: bool = False
+    ):
+        """
+        Initialize the FAISS vector store
+
+        Args:
+            embedding_model: Model used to embed documents and queries
+            persist_directory: Directory to persist the index and documents
+            quantize: Store embeddings as 8-bit scalar-quantized codes, a
+                quarter of the float32 size, at a small cost in score
+                precision. The quantizer's per-dimension ranges are trained
+                on the first batch added, so add the corpus in one call.
+        """
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError("FAISSVectorStore requires the faiss package: pip install faiss-cpu") from e
+
+        self._faiss = faiss
+        self.embedding_model = embedding_model
+        self.persist_directory = persist_directory
+        self.quantize = quantize
+        self._index_path = os.path.join(persist_directory, "faiss.index")
+        self._data_path = os.path.join(persist_directory, "faiss_documents.json")
+        os.makedirs(persist_directory, exist_ok=True)
+
+        data = {}
+        if os.path.exists(self._index_path) and os.path.exists(self._data_path):
+            with open(self._data_path, 'r') as f:
+                data = json.load(f)
+            if data.get("quantized", False) == quantize:
+                self.index = faiss.read_index(self._index_path)
+            else:
+                # Start empty so the caller re-indexes in the requested format
+                logger.warning(f"Ignoring FAISS index at {persist_directory} stored with quantized={not quantize}")
+                data = {}
+        if not data:
+            self.index = self._new_index()
+        self.documents: List[str] = data.get("documents", [])
+        self.metadatas: List[Dict] = data.get("metadatas", [])
+        self.ids: List[str] = data.get("ids", [])
+        self.content_hash: Optional[str] = data.get("content_hash")
+        logger.info(f"FAISS index at {persist_directory} initialized with {self.index.ntotal} documents")
+
+    def _new_index(self):
+        """Create an empty inner-product index in the configured format"""
+        dimension = self.embedding_model.embedding_dimension
+        if self.quantize:
+            return self._faiss.IndexScalarQuantizer(
+                dimension, self._faiss.ScalarQuantizer.QT_8bit, self._faiss.METRIC_INNER_PRODUCT
+            )
+        return self._faiss.IndexFlatIP(dimension)
+
+    def _save(self):
+        """Write the index and documents to disk"""
+        self._faiss.write_index(self.index, self._index_path)
+        with open(self._data_path, 'w') as f:
+            json.dump({
+                "quantized": self.quantize,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+                "ids": self.ids,
+                "content_hash": self.content_hash
+            }, f)
+
+    def count(self) -> int:
+        """Return the number of documents in the index"""
+        return self.index.ntotal
+
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> Future:
+        """
+        Add documents to the index
+
+        Args:
+            documents: List of text documents
+            metadatas: List of metadata dictionaries
+            ids: List of unique document IDs
+            embeddings: Optional precomputed unit-length embeddings, one per document
+
+        Returns:
+            Completed Future, like VectorStore.add_documents; the write
+            itself is synchronous and raises directly
+        """
+        self._write_documents(documents, metadatas, ids, embeddings)
+        future: Future = Future()
+        future.set_result(None)
+        return future
+
+    def _write_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]]
+    ):
+        """Embed and add documents that are not yet in the index"""
+        # Like Chroma, skip IDs that are already stored
+        known = set(self.ids)
+        keep = []
+        for idx, doc_id in enumerate(ids):
+            if doc_id in known:
+                logger.warning(f"Skipping document {doc_id}: ID already exists")
+                continue
+            known.add(doc_id)
+            keep.append(idx)
+        if not keep:
+            return
+
+        documents = [documents[idx] for idx in keep]
+        if embeddings is None:
+            embeddings = self.embedding_model.embed_texts(documents)
+        else:
+            embeddings = [embeddings[idx] for idx in keep]
+
+        logger.info(f"Adding {len(documents)} documents to FAISS index")
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add(vectors)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas[idx] for idx in keep)
+        self.ids.extend(ids[idx] for idx in keep)
+        self._save()
+        logger.info(f"Successfully added documents. Total count: {self.index.ntotal}")
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 3,
+        where: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Query the index for similar documents
+
+        Same arguments as query_iter(), with the hits laid out as Chroma's
+        nested lists.
+
+        Returns:
+            Dictionary with query results containing documents, metadatas, and distances
+        """
+        return _hits_to_results([tuple(self.query_iter(query_text, n_results, where))])
+
+    def query_iter(
+        self,
+        query_text: str,
+        n_results: int = 3,
+        where: Optional[Dict] = None
+    ) -> Iterator[QueryHit]:
+        """
+        Query the index and iterate over the hits
+
+        Args:
+            query_text: Query text to search for
+            n_results: Number of results to return
+            where: Optional metadata filter ({"field": value} equality only)
+
+        Returns:
+            Iterator of QueryHit(doc, meta, distance, id), in rank order
+        """
+        return iter(self.query_batch_hits([query_text], n_results=n_results, where=where)[0])
+
+    def query_batch(
+        self,
+        query_texts: List[str],
+        n_results: int = 3,
+        where: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Query the index for several texts at once
+
+        Same arguments as query_batch_hits(), with the hits laid out as
+        Chroma's nested lists.
+
+        Returns:
+            Dictionary with one list of ids, documents, metadatas and
+            (cosine) distances per query, shaped like Chroma's results
+        """
+        return _hits_to_results(self.query_batch_hits(query_texts, n_results=n_results, where=where))
+
+    def query_batch_hits(
+        self,
+        query_texts: List[str],
+        n_results: int = 3,
+        where: Optional[Dict] = None
+    ) -> List[Tuple[QueryHit, ...]]:
+        """
+        Query the index for several texts at once
+
+        Args:
+            query_texts: Query texts to search for
+            n_results: Number of results to return per query
+            where: Optional metadata filter ({"field": value} equality only)
+
+        Returns:
+            One tuple of QueryHit per query, in order, with cosine distances
+
+        Raises:
+            ValueError: If the filter uses an operator such as $and or $in
+        """
+        if not query_texts:
+            return []
+
+        if where and any(key.startswith("$") for key in where):
+            raise ValueError("FAISSVectorStore only supports equality metadata filters")
+
+        queries = np.asarray(self.embedding_model.embed_texts(query_texts), dtype=np.float32)
+        # A filter is applied after the search, so scan everything when filtering
+        k = self.index.ntotal if where else min(n_results, self.index.ntotal)
+        if k:
+            scores, indexes = self.index.search(queries, k)
+        else:
+            scores = indexes = np.empty((len(query_texts), 0))
+
+        rows = []
+        for row_scores, row_indexes in zip(scores.tolist(), indexes.tolist()):
+            matches = [
+                (idx, score) for idx, score in zip(row_indexes, row_scores)
+                if idx >= 0 and (not where or all(self.metadatas[idx].get(key) == value for key, value in where.items()))
+            ][:n_results]
+            rows.append(tuple(
+                QueryHit(self.documents[idx], self.metadatas[idx], 1.0 - score, self.ids[idx])
+                for idx, score in matches
+            ))
+        return rows
+
+    def get_content_hash(self) -> Optional[str]:
+        """Return the hash of the source data the index was built from, if recorded"""
+        return self.content_hash
+
+    def set_content_hash(self, content_hash: str):
+        """
+        Record the hash of the source data the index was built from
+
+        Args:
+            content_hash: Hash of the indexed source data
+        """
+        self.content_hash = content_hash
+        self._save()
+
+    def close(self):
+        """Release the store; a no-op, since every write is already on disk"""
+
+    def reset(self):
+        """Reset the store to an empty index"""
+        logger.warning("Resetting FAISS index")
+        self.index = self._new_index()
+        self.documents, self.metadatas, self.ids = [], [], []
+        self.content_hash = None
+        self._save()
+        logger.info("Vector store reset complete")
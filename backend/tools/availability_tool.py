@@ -1,16 +1,33 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Dict, Optional
 import logging
+from ..cache import ResponseCache
 from ..api.calendly_integration import CalendlyMockAPI
 
 logger = logging.getLogger(__name__)
 
+# Availability results are reused for a minute; any booking change makes them
+# stale immediately (they are keyed on the Calendly bookings version)
+AVAILABILITY_CACHE_SIZE = 256
+AVAILABILITY_CACHE_TTL_SECONDS = 60
+
+
+@lru_cache(maxsize=512)
+def _day_name(date_str: str) -> str:
+    """Weekday name of a "YYYY-MM-DD" date string"""
+    return datetime.strptime(date_str, "%Y-%m-%d").strftime("%A")
+
 
 class AvailabilityTool:
     """Tool for checking appointment availability"""
 
     def __init__(self, calendly_api: CalendlyMockAPI):
         self.calendly_api = calendly_api
+        self._cache = ResponseCache(
+            max_entries=AVAILABILITY_CACHE_SIZE,
+            ttl_seconds=AVAILABILITY_CACHE_TTL_SECONDS
+        )
 
     def check_availability(
         self,
@@ -30,20 +47,67 @@ class AvailabilityTool:
             Dictionary with availability information
         """
         logger.info(f"Checking availability for {date_str}")
-
-        available_slots = self.calendly_api.get_available_slots_only(
-            date_str=date_str,
+        return self.check_availability_bulk(
+            [date_str],
             appointment_type=appointment_type,
             time_preference=time_preference
-        )
+        )[date_str]
 
-        return {
-            "date": date_str,
-            "appointment_type": appointment_type,
-            "time_preference": time_preference,
-            "available_slots": available_slots,
-            "slots_count": len(available_slots)
-        }
+    def check_availability_bulk(
+        self,
+        dates: List[str],
+        appointment_type: str = "consultation",
+        time_preference: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        Check availability for several dates in one Calendly lookup
+
+        Args:
+            dates: Date strings in format "YYYY-MM-DD"
+            appointment_type: Type of appointment
+            time_preference: Optional time preference ("morning", "afternoon", "evening")
+
+        Returns:
+            Dictionary mapping each date string to its availability information
+        """
+        # The version is read before computing, so a booking made meanwhile
+        # leaves these results under an already-stale key
+        self.calendly_api.reload_if_changed()
+        version = self.calendly_api.bookings_version
+        results: Dict[str, Dict] = {}
+        misses: List[str] = []
+        for date_str in dates:
+            if date_str in results:
+                continue
+            result = self._cache.get((version, date_str, appointment_type, time_preference))
+            if result is None:
+                misses.append(date_str)
+            results[date_str] = result
+
+        if misses:
+            slots_by_date = self.calendly_api.get_available_slots_bulk(
+                date_strs=misses,
+                appointment_type=appointment_type,
+                time_preference=time_preference
+            )
+            for date_str in misses:
+                available_slots = slots_by_date[date_str]
+                result = {
+                    "date": date_str,
+                    "appointment_type": appointment_type,
+                    "time_preference": time_preference,
+                    "available_slots": available_slots,
+                    "slots_count": len(available_slots)
+                }
+                self._cache.put((version, date_str, appointment_type, time_preference), result)
+                results[date_str] = result
+
+        return {date_str: self._copy_result(result) for date_str, result in results.items()}
+
+    @staticmethod
+    def _copy_result(result: Dict) -> Dict:
+        """Copy a cached result deeply enough that callers can't mutate the cache"""
+        return {**result, "available_slots": [dict(slot) for slot in result["available_slots"]]}
 
     def find_next_available_dates(
         self,
@@ -67,22 +131,26 @@ class AvailabilityTool:
         logger.info(f"Finding next available dates for {appointment_type}")
 
         today = datetime.now().date()
-        available_dates = []
-
-        for i in range(1, days_to_check + 1):
-            check_date = today + timedelta(days=i)
-            date_str = check_date.strftime("%Y-%m-%d")
 
-            result = self.check_availability(
-                date_str=date_str,
-                appointment_type=appointment_type,
-                time_preference=time_preference
-            )
+        # Days off never have slots; skip them without computing any
+        date_strs = [
+            check_date.strftime("%Y-%m-%d")
+            for check_date in (today + timedelta(days=i) for i in range(1, days_to_check + 1))
+            if self.calendly_api.is_working_day(check_date)
+        ]
+        results = self.check_availability_bulk(
+            date_strs,
+            appointment_type=appointment_type,
+            time_preference=time_preference
+        )
 
+        available_dates = []
+        for date_str in date_strs:
+            result = results[date_str]
             if result['slots_count'] > 0:
                 available_dates.append({
                     "date": date_str,
-                    "day_name": check_date.strftime("%A"),
+                    "day_name": _day_name(date_str),
                     "available_slots": result['available_slots'][:5],  # Limit to first 5 slots
                     "total_slots": result['slots_count']
                 })
@@ -122,12 +190,13 @@ class AvailabilityTool:
             )
 
             if result['slots_count'] > 0:
+                day_name = _day_name(preferred_date)
                 for slot in result['available_slots'][:num_suggestions]:
                     suggestions.append({
                         "date": preferred_date,
                         "start_time": slot['start_time'],
                         "end_time": slot['end_time'],
-                        "day_name": datetime.strptime(preferred_date, "%Y-%m-%d").strftime("%A")
+                        "day_name": day_name
                     })
         else:
             # Find next available dates
@@ -1,9 +1,38 @@
 from typing import Dict, Optional
 import logging
+import re
 from ..api.calendly_integration import CalendlyMockAPI
+from ..models.schemas import EMAIL_PATTERN
 
 logger = logging.getLogger(__name__)
 
+# Labels reported for missing booking fields, in validate_booking_info
+# argument order
+_REQUIRED_FIELD_LABELS = ("name", "email", "phone", "reason for visit")
+
+# Shape checks, compiled once. A phone number is an optional "+", then
+# digits, spaces, dashes, dots or parentheses, with at least seven digits.
+_EMAIL_RE = re.compile(EMAIL_PATTERN)
+_PHONE_RE = re.compile(r"^\+?\(?\d[\d\s().-]{6,}$")
+_NON_DIGIT_RE = re.compile(r"\D")
+_MIN_PHONE_DIGITS = 7
+
+
+def _normalize_email(email: str) -> str:
+    """Canonical form of an email address: trimmed and lowercased"""
+    return email.strip().lower()
+
+
+def _is_valid_phone(phone: str) -> bool:
+    """Whether a phone number has the expected shape and enough digits"""
+    return bool(_PHONE_RE.match(phone)) and len(_NON_DIGIT_RE.sub("", phone)) >= _MIN_PHONE_DIGITS
+
+
+def _normalize_phone(phone: str) -> str:
+    """Canonical form of a phone number: its digits, keeping a leading "+" """
+    digits = _NON_DIGIT_RE.sub("", phone)
+    return f"+{digits}" if phone.strip().startswith("+") else digits
+
 
 class BookingTool:
     """Tool for booking and managing appointments"""
@@ -38,10 +67,12 @@ class BookingTool:
         """
         logger.info(f"Creating booking for {patient_name} on {date} at {start_time}")
 
+        # Normalized, so the same patient is stored the same way however
+        # they typed their contact details
         patient_info = {
             "name": patient_name,
-            "email": patient_email,
-            "phone": patient_phone
+            "email": _normalize_email(patient_email),
+            "phone": _normalize_phone(patient_phone)
         }
 
         try:
@@ -111,22 +142,22 @@ class BookingTool:
             reason: Reason for visit
 
         Returns:
-            Dictionary with validation results and missing fields
+            Dictionary with validation results, missing fields and fields
+            that are present but malformed
         """
-        missing_fields = []
-
-        if not patient_name:
-            missing_fields.append("name")
-        if not patient_email:
-            missing_fields.append("email")
-        if not patient_phone:
-            missing_fields.append("phone")
-        if not reason:
-            missing_fields.append("reason for visit")
+        values = (patient_name, patient_email, patient_phone, reason)
+        missing_fields = [
+            label for label, value in zip(_REQUIRED_FIELD_LABELS, values) if not value
+        ]
 
-        is_valid = len(missing_fields) == 0
+        invalid_fields = []
+        if patient_email and not _EMAIL_RE.match(patient_email.strip()):
+            invalid_fields.append("email")
+        if patient_phone and not _is_valid_phone(patient_phone.strip()):
+            invalid_fields.append("phone")
 
         return {
-            "is_valid": is_valid,
-            "missing_fields": missing_fields
+            "is_valid": not missing_fields and not invalid_fields,
+            "missing_fields": missing_fields,
+            "invalid_fields": invalid_fields
         }
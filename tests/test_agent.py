@@ -1,20 +1,38 @@
+import asyncio
+import hashlib
+import json
 import pytest
+import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.agent.scheduling_agent import SchedulingAgent
+from backend.agent.scheduling_agent import SchedulingAgent, _history_split, _render_slot_reply
+from backend.agent.prompts import HISTORY_SUMMARY_SYSTEM_PROMPT
+from backend.models.schemas import ConversationState
+from backend.agent.llm_executor import BatchLLMExecutor, LLMExecutor
 from backend.rag.faq_rag import FAQRAG
-from backend.api.calendly_integration import CalendlyMockAPI
+from backend.api.calendly_integration import CalendlyMockAPI, _BookedIntervals
 from backend.tools.availability_tool import AvailabilityTool
 from backend.tools.booking_tool import BookingTool
+from backend.rag.vector_store import FAISSVectorStore, VectorStore, mmr_select
+from backend.cache import SemanticResponseCache
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def calendly_api():
-    """Fixture for Calendly API"""
+    """Fixture for Calendly API, shared read-only across the session"""
     return CalendlyMockAPI(schedule_path="./data/doctor_schedule.json")
 
 
@@ -25,18 +43,229 @@ def availability_tool(calendly_api):
 
 
 @pytest.fixture
-def booking_tool(calendly_api):
-    """Fixture for booking tool"""
-    return BookingTool(calendly_api)
+def booking_tool():
+    """Fixture for booking tool, on its own Calendly API since bookings mutate it"""
+    return BookingTool(CalendlyMockAPI(schedule_path="./data/doctor_schedule.json"))
+
+
+class FakeEmbeddingModel:
+    """Offline stand-in for EmbeddingModel: the normalized sum of fixed per-word vectors"""
+
+    embedding_dimension = 32
+
+    def embed_text(self, text):
+        vector = np.zeros(self.embedding_dimension)
+        for word in text.lower().split():
+            seed = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little")
+            vector += np.random.default_rng(seed).standard_normal(self.embedding_dimension)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_texts(self, texts):
+        return [self.embed_text(text) for text in texts]
+
+
+_FAKE_DOCUMENTS = [
+    "We accept most major insurance plans",
+    "The clinic opens at eight in the morning",
+    "Parking is free in the lot behind the building",
+    "Bring your insurance card and photo ID",
+    "Cancel at least a day ahead to avoid a fee"
+]
+
+
+def _add_fake_documents(store, documents=_FAKE_DOCUMENTS, start=0):
+    """Add documents to a vector store with a category per document and wait for the write"""
+    store.add_documents(
+        documents=documents,
+        metadatas=[{"category": "insurance" if "insurance" in doc else "general"} for doc in documents],
+        ids=[f"doc_{start + i}" for i in range(len(documents))]
+    ).result()
+
+
+class FakeFAQ:
+    """FAQRAG stand-in that records lookups; change content_hash to simulate new clinic data"""
+
+    embedding_model = None
+
+    def __init__(self):
+        self.content_hash = "v1"
+        self.lookups = []
+
+    def reload_if_changed(self):
+        return False
+
+    def get_contexts_for_questions(self, questions, n_results=3):
+        self.lookups.append(list(questions))
+        return [f"Context for {question}" for question in questions]
+
+
+class ScriptedLLM:
+    """Mock LLM API: records each request body and answers from a script of responses"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def handle(self, request):
+        self.requests.append(json.loads(request.content))
+        response = self.responses.pop(0)
+        if callable(response):
+            response = response(self.requests[-1])
+        if isinstance(response, httpx.Response):
+            return response
+        return httpx.Response(200, json=response)
+
+
+def openai_completion(content=None, tool_calls=()):
+    """OpenAI chat completion body with a text reply and/or (name, arguments) tool calls"""
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {"id": f"call_{idx}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            for idx, (name, arguments) in enumerate(tool_calls)
+        ]
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{"index": 0, "finish_reason": "tool_calls" if tool_calls else "stop", "message": message}]
+    }
+
+
+def anthropic_message(content=None, tool_calls=()):
+    """Anthropic message body with a text reply and/or (name, arguments) tool calls"""
+    blocks = [{"type": "text", "text": content}] if content else []
+    blocks += [
+        {"type": "tool_use", "id": f"toolu_{idx}", "name": name, "input": arguments}
+        for idx, (name, arguments) in enumerate(tool_calls)
+    ]
+    return {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "model": "test-model",
+        "content": blocks,
+        "stop_reason": "tool_use" if tool_calls else "end_turn",
+        "usage": {"input_tokens": 1, "output_tokens": 1}
+    }
+
+
+def _sse(events):
+    """Server-sent events response body carrying the given (event name, data) pairs"""
+    body = b"".join(
+        (f"event: {name}\n".encode() if name else b"") + b"data: " + json.dumps(data).encode() + b"\n\n"
+        for name, data in events
+    )
+    return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+
+def openai_stream(*deltas, tool_calls=(), merge=False):
+    """
+    Streamed OpenAI chat completion: one chunk per text delta, then one per tool call
+
+    With merge, the first tool call arrives in the last text chunk instead.
+    """
+    def chunk(delta, finish_reason=None):
+        return None, {
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+
+    events = [chunk({"role": "assistant", "content": text}) for text in deltas]
+    events += [
+        chunk({"tool_calls": [{
+            "index": idx,
+            "id": f"call_{idx}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)}
+        }]})
+        for idx, (name, arguments) in enumerate(tool_calls)
+    ]
+    if merge and deltas and tool_calls:
+        _, tool_chunk = events.pop(len(deltas))
+        events[len(deltas) - 1][1]["choices"][0]["delta"].update(tool_chunk["choices"][0]["delta"])
+    events.append(chunk({}, "tool_calls" if tool_calls else "stop"))
+    response = _sse(events)
+    return httpx.Response(200, content=response.content + b"data: [DONE]\n\n", headers=response.headers)
+
+
+def anthropic_stream(*deltas):
+    """Streamed Anthropic message with one text block built from the deltas"""
+    return _sse([
+        ("message_start", {"type": "message_start", "message": {
+            "id": "msg_test", "type": "message", "role": "assistant", "model": "test-model", "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": 1, "output_tokens": 1}
+        }}),
+        ("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}),
+        *[
+            ("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}})
+            for text in deltas
+        ],
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": 1}}),
+        ("message_stop", {"type": "message_stop"})
+    ])
+
+
+def make_agent(llm, provider="openai", **kwargs):
+    """Build a SchedulingAgent whose LLM calls are answered by a ScriptedLLM"""
+    agent = SchedulingAgent(llm_provider=provider, llm_model="test-model", api_key="test-key", **kwargs)
+    client_class = AsyncOpenAI if provider == "openai" else AsyncAnthropic
+    agent.llm_client = client_class(
+        api_key="test-key",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(llm.handle))
+    )
+    agent.llm_executor = LLMExecutor(agent.llm_client, provider)
+    agent.batch_executor = BatchLLMExecutor(agent.llm_client, provider, poll_interval=0)
+    return agent
+
+
+def _upcoming_weekday() -> str:
+    """A Monday-Thursday date a week or more ahead, so it is never in the past"""
+    day = date.today() + timedelta(days=7)
+    while day.weekday() > 3:
+        day += timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def schedule_path(tmp_path):
+    """Fixture for a private copy of the schedule file, for tests that book"""
+    path = tmp_path / "doctor_schedule.json"
+    shutil.copy("./data/doctor_schedule.json", path)
+    return str(path)
 
 
 @pytest.fixture
+def vector_store(tmp_path):
+    """Fixture for an empty Chroma vector store with an offline embedding model"""
+    store = VectorStore(persist_directory=str(tmp_path / "vectordb"), embedding_model=FakeEmbeddingModel())
+    yield store
+    store.close()
+
+
+@pytest.fixture(scope="session")
 def faq_rag():
-    """Fixture for FAQ RAG"""
-    return FAQRAG(
+    """Fixture for FAQ RAG, built once per session"""
+    rag = FAQRAG(
         data_path="./data/clinic_info.json",
         vector_store_path="./data/vectordb"
     )
+    yield rag
+    rag.close()
+
+
+def test_agent_module_imports():
+    """Smoke test: the agent module must import cleanly"""
+    import importlib
+
+    module = importlib.import_module("backend.agent.scheduling_agent")
+    assert hasattr(module, "SchedulingAgent")
 
 
 def test_calendly_availability(calendly_api):
@@ -65,6 +294,157 @@ def test_availability_tool(availability_tool):
         print(f"  - {slot['date']} ({slot['day_name']}) at {slot['start_time']}")
 
 
+def test_availability_cache_invalidated_by_booking(schedule_path):
+    """Test a booking bumps the bookings version and refreshes cached availability"""
+    calendly_api = CalendlyMockAPI(schedule_path=schedule_path)
+    tool = AvailabilityTool(calendly_api)
+    day = _upcoming_weekday()
+
+    before = tool.check_availability(day)
+    first_slot = before["available_slots"][0]["start_time"]
+
+    # Callers get copies, so mutating a result leaves the cache intact
+    before["available_slots"][0]["start_time"] = "00:00"
+    before["available_slots"].clear()
+    cached = tool.check_availability(day)
+    assert cached["available_slots"][0]["start_time"] == first_slot
+
+    version = calendly_api.bookings_version
+    booking = calendly_api.book_appointment(
+        appointment_type="consultation",
+        date_str=day,
+        start_time=first_slot,
+        patient={"name": "Test Patient", "email": "test@example.com", "phone": "+1-555-0199"},
+        reason="Cache test"
+    )
+    assert booking["status"] == "confirmed"
+    assert calendly_api.bookings_version > version
+
+    after = tool.check_availability(day)
+    assert first_slot not in [slot["start_time"] for slot in after["available_slots"]]
+    assert after["slots_count"] < cached["slots_count"]
+
+
+def _brute_force_overlaps(intervals, start, end):
+    return any(booked_start < end and start < booked_end for booked_start, booked_end in intervals)
+
+
+def test_booked_intervals_overlaps():
+    """Test overlap checks agree with a brute-force scan, including nested and touching intervals"""
+    # Containment: a long booking hides short ones inside it from a plain
+    # "last start before the slot" check; touching intervals do not overlap
+    booked = _BookedIntervals([(60, 300), (90, 100), (400, 430)])
+    assert booked.overlaps(200, 215)
+    assert booked.overlaps(0, 61)
+    assert not booked.overlaps(300, 400)
+    assert not booked.overlaps(0, 60)
+    assert not booked.overlaps(430, 500)
+
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        starts = rng.integers(0, 600, size=rng.integers(0, 12))
+        intervals = [(int(start), int(start + rng.integers(1, 120))) for start in starts]
+        booked = _BookedIntervals(intervals)
+
+        slot_starts = np.arange(0, 720, 5)
+        slot_ends = slot_starts + 15
+        expected = [_brute_force_overlaps(intervals, start, end) for start, end in zip(slot_starts, slot_ends)]
+        assert [booked.overlaps(start, end) for start, end in zip(slot_starts, slot_ends)] == expected
+        assert booked.overlaps_many(slot_starts, slot_ends).tolist() == expected
+
+
+def test_booked_intervals_remove():
+    """Test removing an interval recomputes the running maximum end"""
+    booked = _BookedIntervals([(60, 300), (90, 100), (120, 130)])
+    assert booked.overlaps_many(np.array([200]), np.array([215])).tolist() == [True]
+
+    assert booked.remove((60, 300))
+    assert not booked.remove((60, 300))
+    assert booked.max_ends == [100, 130]
+    assert not booked.overlaps(200, 215)
+    # The vectorized arrays are rebuilt after the change
+    assert booked.overlaps_many(np.array([200, 95]), np.array([215, 110])).tolist() == [False, True]
+
+    rng = np.random.default_rng(11)
+    intervals = [(int(start), int(start + rng.integers(1, 120))) for start in rng.integers(0, 600, size=30)]
+    booked = _BookedIntervals(intervals)
+    remaining = list(intervals)
+    for interval in rng.permutation(len(intervals))[:20]:
+        removed = intervals[interval]
+        assert booked.remove(removed)
+        remaining.remove(removed)
+        for start in range(0, 720, 10):
+            assert booked.overlaps(start, start + 15) == _brute_force_overlaps(remaining, start, start + 15)
+    assert len(booked) == len(remaining)
+
+
+_TEST_PATIENT = {"name": "Test Patient", "email": "test@example.com", "phone": "+1-555-0199"}
+
+
+def test_booking_log_replay_and_compaction(schedule_path):
+    """Test bookings and cancellations survive a restart through the log, which compaction empties"""
+    day = _upcoming_weekday()
+    calendly_api = CalendlyMockAPI(schedule_path=schedule_path, compact_every=4)
+    first = calendly_api.book_appointment("followup", day, "08:00", _TEST_PATIENT, "Log test")
+    second = calendly_api.book_appointment("followup", day, "09:00", _TEST_PATIENT, "Log test")
+    assert calendly_api.cancel_booking(first["booking_id"])
+    assert len(Path(calendly_api.bookings_log_path).read_text().splitlines()) == 3
+
+    # A restart replays the log on top of the schedule file
+    reopened = CalendlyMockAPI(schedule_path=schedule_path, compact_every=4)
+    assert reopened.get_booking(first["booking_id"])["status"] == "cancelled"
+    assert reopened.get_booking(second["booking_id"])["status"] == "confirmed"
+    open_slots = [slot["start_time"] for slot in reopened.get_available_slots_only(day, "followup")]
+    assert "08:00" in open_slots
+    assert "09:00" not in open_slots
+
+    # A torn last line is dropped, and later appends still start on a fresh line
+    with open(calendly_api.bookings_log_path, "a") as f:
+        f.write('{"op": "book", "booking": {"booking_')
+    reopened = CalendlyMockAPI(schedule_path=schedule_path, compact_every=5)
+    assert reopened.get_booking(second["booking_id"])["status"] == "confirmed"
+    third = reopened.book_appointment("followup", day, "10:00", _TEST_PATIENT, "Log test")
+    assert CalendlyMockAPI(schedule_path=schedule_path).get_booking(third["booking_id"]) is not None
+
+    # The next change reaches compact_every and folds the log into the schedule file
+    assert reopened.cancel_booking(third["booking_id"])
+    assert Path(reopened.bookings_log_path).read_text() == ""
+    compacted = CalendlyMockAPI(schedule_path=schedule_path)
+    assert compacted.get_booking(first["booking_id"])["status"] == "cancelled"
+    assert compacted.get_booking(second["booking_id"])["status"] == "confirmed"
+    assert compacted.get_booking(third["booking_id"])["status"] == "cancelled"
+
+
+def test_booking_log_shared_between_instances(schedule_path):
+    """Test instances sharing a schedule file (one per worker process) see each other's bookings"""
+    day = _upcoming_weekday()
+    worker_a = CalendlyMockAPI(schedule_path=schedule_path)
+    worker_b = CalendlyMockAPI(schedule_path=schedule_path, compact_every=2)
+
+    # B replays A's logged booking before checking the slot
+    first = worker_a.book_appointment("followup", day, "08:00", _TEST_PATIENT, "Shared test")
+    assert first["status"] == "confirmed"
+    assert worker_b.book_appointment("followup", day, "08:00", _TEST_PATIENT, "Shared test")["status"] == "failed"
+    assert worker_b.get_booking(first["booking_id"])["status"] == "confirmed"
+
+    # B's second log entry (A's replayed one counts) compacts, keeping A's booking, and A reloads the rewritten schedule
+    second = worker_b.book_appointment("followup", day, "09:00", _TEST_PATIENT, "Shared test")
+    assert Path(worker_b.bookings_log_path).read_text() == ""
+    assert worker_a.cancel_booking(second["booking_id"])
+    assert worker_b.get_booking(second["booking_id"])["status"] == "cancelled"
+    restarted = CalendlyMockAPI(schedule_path=schedule_path)
+    assert restarted.get_booking(first["booking_id"])["status"] == "confirmed"
+    assert restarted.get_booking(second["booking_id"])["status"] == "cancelled"
+
+    # Racing instances share only the file lock; exactly one gets the slot
+    racers = [CalendlyMockAPI(schedule_path=schedule_path) for _ in range(4)]
+    with ThreadPoolExecutor(len(racers)) as pool:
+        results = list(pool.map(
+            lambda api: api.book_appointment("followup", day, "10:00", _TEST_PATIENT, "Shared test"), racers
+        ))
+    assert sorted(result["status"] for result in results) == ["confirmed", "failed", "failed", "failed"]
+
+
 def test_faq_rag(faq_rag):
     """Test FAQ RAG system"""
     # Test querying
@@ -106,6 +486,27 @@ def test_booking_validation(booking_tool):
     assert validation["is_valid"]
     assert len(validation["missing_fields"]) == 0
 
+    # Test malformed info
+    validation = booking_tool.validate_booking_info(
+        patient_name="John Doe",
+        patient_email="john.example.com",
+        patient_phone="12",
+        reason="Checkup"
+    )
+
+    assert not validation["is_valid"]
+    assert validation["invalid_fields"] == ["email", "phone"]
+
+    # Punctuation does not count towards the seven digits a phone number needs
+    for phone in ("1------", "(1) 2-3.4 5"):
+        validation = booking_tool.validate_booking_info(
+            patient_name="John Doe",
+            patient_email="john@example.com",
+            patient_phone=phone,
+            reason="Checkup"
+        )
+        assert validation["invalid_fields"] == ["phone"]
+
 
 def test_mock_booking(booking_tool):
     """Test creating a mock booking"""
@@ -129,29 +530,617 @@ def test_mock_booking(booking_tool):
         print(f"\nBooking failed: {result['details'].get('error')}")
 
 
-# Example conversation test
-def test_example_conversation():
-    """Test an example conversation flow"""
-    print("\n" + "="*50)
-    print("EXAMPLE CONVERSATION FLOW")
-    print("="*50)
-
-    conversation_steps = [
-        "I need to see the doctor",
-        "I've been having headaches",
-        "Afternoon would be good, sometime this week",
-        "Wednesday at 3:30 PM works for me",
-        "John Doe",
-        "john.doe@email.com",
-        "+1-555-0123"
+def test_tool_argument_validation():
+    """Test malformed tool calls are rejected before dispatch"""
+    from backend.agent.scheduling_agent import _validate_tool_arguments
+
+    assert _validate_tool_arguments("answer_faq", {"question": "What are your hours?"}) is None
+
+    result = _validate_tool_arguments("check_availability", {"date": "2024-12-10", "appointment_type": "dental"})
+    assert not result["success"]
+    assert "appointment_type" in result["error"]
+
+    assert not _validate_tool_arguments("unknown_tool", {})["success"]
+
+
+def test_vector_store_query_cache(vector_store):
+    """Test repeated batch queries are served from the cache and writes invalidate it"""
+    _add_fake_documents(vector_store)
+    questions = ["insurance plans", "when do you open"]
+
+    first = vector_store.query_batch(questions, n_results=2)
+    assert first["ids"][0][0] == "doc_0"
+    hits = list(vector_store.query_iter("insurance plans", n_results=2))
+    assert [hit.id for hit in hits] == first["ids"][0]
+    assert [hit.meta for hit in hits] == first["metadatas"][0]
+    misses = vector_store.get_cache_stats()["misses"]
+    hits = vector_store.get_cache_stats()["hits"]
+
+    # Case and whitespace differences map to the same cache entry
+    second = vector_store.query_batch(["Insurance  plans", "when do you open"], n_results=2)
+    assert second == first
+    assert vector_store.get_cache_stats()["hits"] == hits + 2
+    assert vector_store.get_cache_stats()["misses"] == misses
+
+    # New documents must show up in the next query
+    _add_fake_documents(vector_store, ["New insurance plans accepted"], start=len(_FAKE_DOCUMENTS))
+    assert vector_store.get_cache_stats()["size"] == 0
+    updated = vector_store.query_batch(questions, n_results=2)
+    assert "doc_5" in updated["ids"][0]
+
+    vector_store.reset()
+    assert vector_store.query_batch(questions, n_results=2)["ids"] == [[], []]
+
+
+def test_faiss_vector_store(tmp_path, vector_store):
+    """Test the FAISS store ranks like Chroma, filters, resets and reloads from disk"""
+    pytest.importorskip("faiss")
+    store = FAISSVectorStore(embedding_model=FakeEmbeddingModel(), persist_directory=str(tmp_path / "faiss"))
+    _add_fake_documents(store)
+    _add_fake_documents(vector_store)
+    questions = ["insurance plans", "free parking", "cancellation fee"]
+
+    faiss_results = store.query_batch(questions, n_results=3)
+    chroma_results = vector_store.query_batch(questions, n_results=3)
+    assert faiss_results["ids"] == chroma_results["ids"]
+    for faiss_distances, chroma_distances in zip(faiss_results["distances"], chroma_results["distances"]):
+        assert faiss_distances == pytest.approx(chroma_distances, abs=1e-5)
+
+    # Re-adding known IDs is skipped, like Chroma
+    _add_fake_documents(store)
+    assert store.count() == len(_FAKE_DOCUMENTS)
+
+    # Equality filters apply to the whole index, not just the top hits
+    filtered = store.query("free parking", n_results=5, where={"category": "insurance"})
+    assert sorted(filtered["ids"][0]) == ["doc_0", "doc_3"]
+    with pytest.raises(ValueError):
+        store.query("free parking", where={"$or": [{"category": "insurance"}]})
+
+    # A new instance reads the saved index, documents and content hash
+    store.set_content_hash("abc123")
+    reopened = FAISSVectorStore(embedding_model=FakeEmbeddingModel(), persist_directory=str(tmp_path / "faiss"))
+    assert reopened.count() == len(_FAKE_DOCUMENTS)
+    assert reopened.get_content_hash() == "abc123"
+    assert reopened.query_batch(questions, n_results=3) == faiss_results
+
+    reopened.reset()
+    assert reopened.count() == 0
+    assert reopened.get_content_hash() is None
+    assert list(reopened.query_iter("insurance plans")) == []
+    assert FAISSVectorStore(embedding_model=FakeEmbeddingModel(), persist_directory=str(tmp_path / "faiss")).count() == 0
+
+
+def test_faiss_quantized_reopen(tmp_path, caplog):
+    """Test a quantized index reopens as quantized and a mismatched flag refuses the saved index"""
+    faiss = pytest.importorskip("faiss")
+    path = str(tmp_path / "faiss")
+    store = FAISSVectorStore(embedding_model=FakeEmbeddingModel(), persist_directory=path, quantize=True)
+    _add_fake_documents(store)
+    results = store.query_batch(["insurance plans"], n_results=2)
+
+    reopened = FAISSVectorStore(embedding_model=FakeEmbeddingModel(), persist_directory=path, quantize=True)
+    assert isinstance(reopened.index, faiss.IndexScalarQuantizer)
+    assert reopened.count() == len(_FAKE_DOCUMENTS)
+    assert reopened.query_batch(["insurance plans"], n_results=2) == results
+
+    # Opened as a flat index, the quantized one is ignored so the caller re-indexes
+    with caplog.at_level("WARNING"):
+        flat = FAISSVectorStore(embedding_model=FakeEmbeddingModel(), persist_directory=path, quantize=False)
+    assert "quantized=True" in caplog.text
+    assert isinstance(flat.index, faiss.IndexFlatIP)
+    assert flat.count() == 0
+    assert flat.get_content_hash() is None
+
+
+def test_mmr_select():
+    """Test MMR picks the top hit first and pushes near-duplicates down"""
+    query = _unit(1, 0, 0)
+    candidates = np.stack([
+        _unit(1, 0.1, 0),      # best match
+        _unit(1, 0.11, 0),     # near-duplicate of the best match
+        _unit(1, 0, 0.6),      # a little less relevant, but different
+        _unit(0, 1, 0)         # unrelated
+    ])
+
+    # Pure relevance keeps similarity order
+    assert mmr_select(query, candidates, k=3, lambda_=1.0) == [0, 1, 2]
+
+    picks = mmr_select(query, candidates, k=3, lambda_=0.5)
+    assert picks[0] == 0
+    assert picks.index(2) < picks.index(1)
+
+    # k beyond the candidate count returns each candidate once
+    assert sorted(mmr_select(query, candidates, k=10)) == [0, 1, 2, 3]
+    assert mmr_select(query, np.empty((0, 3)), k=3) == []
+    assert mmr_select(query, [], k=3) == []
+
+
+class _SlowEmbeddingModel(FakeEmbeddingModel):
+    """Fake embedding model that takes a while and fails on one document"""
+
+    def embed_texts(self, texts):
+        time.sleep(0.2)
+        if "boom" in texts:
+            raise RuntimeError("embedding failed")
+        return super().embed_texts(texts)
+
+
+def test_vector_store_background_writes(tmp_path):
+    """Test reads wait for queued writes and write errors surface on the returned Future"""
+    store = VectorStore(persist_directory=str(tmp_path / "vectordb"), embedding_model=_SlowEmbeddingModel())
+
+    future = store.add_documents(
+        documents=_FAKE_DOCUMENTS,
+        metadatas=[{"category": "general"}] * len(_FAKE_DOCUMENTS),
+        ids=[f"doc_{i}" for i in range(len(_FAKE_DOCUMENTS))]
+    )
+    assert not future.done()
+    # A read right after queueing sees every document
+    assert store.count() == len(_FAKE_DOCUMENTS)
+    assert future.done()
+    assert store.query("insurance plans", n_results=1)["ids"] == [["doc_0"]]
+
+    failed = store.add_documents(documents=["boom"], metadatas=[{"category": "general"}], ids=["doc_boom"])
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        failed.result()
+    # The failure belongs to its Future; later reads still work
+    assert store.count() == len(_FAKE_DOCUMENTS)
+
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.add_documents(documents=["late"], metadatas=[{"category": "general"}], ids=["doc_late"])
+
+
+def _unit(*components):
+    """Unit vector along the given components"""
+    vector = np.asarray(components, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_cache_ring_buffer_wraparound():
+    """Test the ring buffer overwrites its oldest entry once full"""
+    cache = SemanticResponseCache(max_semantic_entries=3, similarity_threshold=0.99)
+    basis = np.eye(4, dtype=np.float32)
+    for i in range(4):
+        cache.add(basis[i], f"answer {i}")
+
+    assert cache._size == 3
+    assert cache.nearest(basis[0]) is None
+    assert [cache.nearest(basis[i]) for i in (1, 2, 3)] == ["answer 1", "answer 2", "answer 3"]
+
+
+def test_semantic_cache_threshold():
+    """Test nearest only answers above the similarity threshold, and never from expired entries"""
+    cache = SemanticResponseCache(similarity_threshold=0.95)
+    cache.add(_unit(1, 0), "hours")
+
+    assert cache.nearest(_unit(1, 0.2)) == "hours"  # cosine ~0.98
+    assert cache.nearest(_unit(1, 0.5)) is None  # cosine ~0.89
+    assert cache.nearest(_unit(0, 1)) is None
+
+    expired = SemanticResponseCache(ttl_seconds=-1)
+    expired.add(_unit(1, 0), "hours")
+    assert expired.nearest(_unit(1, 0)) is None
+
+
+def test_semantic_cache_get_or_set_many():
+    """Test duplicates are computed once, paraphrases reuse answers and clear() invalidates"""
+    vectors = {
+        "what are your hours": [1.0, 0.0],
+        "when are you open": [1.0, 0.1],
+        "where do i park": [0.0, 1.0]
+    }
+    computed = []
+
+    def compute_many(questions):
+        computed.append(list(questions))
+        return [f"answer to {question}" for question in questions]
+
+    cache = SemanticResponseCache(embed=lambda text: vectors[text], similarity_threshold=0.95)
+    answers = cache.get_or_set_many(["What are your hours", "what are  your hours", "Where do I park"], compute_many)
+    assert computed == [["What are your hours", "Where do I park"]]
+    assert answers == ["answer to What are your hours", "answer to What are your hours", "answer to Where do I park"]
+
+    # A paraphrase close enough to a cached question is answered without computing
+    assert cache.get_or_set("When are you open", lambda question: "fresh") == "answer to What are your hours"
+    assert len(computed) == 1
+
+    cache.clear()
+    assert cache.get_or_set("When are you open", lambda question: "fresh") == "fresh"
+
+    # Without an embed function only exact (normalized) repeats are served
+    exact = SemanticResponseCache()
+    exact.get_or_set("What are your hours", lambda question: "hours")
+    assert exact.get_or_set("  what are YOUR hours ", lambda question: "again") == "hours"
+    assert exact.get_or_set("When are you open", lambda question: "open") == "open"
+
+
+@pytest.mark.asyncio
+async def test_reply_cache():
+    """Test FAQ-only turns are replayed from cache, with their phase, until the clinic data changes"""
+    faq_rag = FakeFAQ()
+    question = "What insurance do you accept?"
+    llm = ScriptedLLM(
+        openai_completion(tool_calls=[("answer_faq", {"question": question})]),
+        openai_completion("We accept most major plans."),
+        openai_completion("Hello! How can I help?")
+    )
+    agent = make_agent(llm, faq_rag=faq_rag)
+    try:
+        first = await agent.chat(question)
+        assert first["message"] == "We accept most major plans."
+        assert first["metadata"]["phase"] == "faq"
+        assert len(llm.requests) == 2
+
+        # Hit: the same opening message in a new conversation skips the LLM and the FAQ lookup
+        second = await agent.chat(question)
+        assert second["message"] == first["message"]
+        assert second["metadata"]["phase"] == "faq"
+        assert second["conversation_id"] != first["conversation_id"]
+        assert len(llm.requests) == 2
+        assert faq_rag.lookups == [[question]]
+
+        # Miss: a different prompt goes to the LLM
+        other = await agent.chat("Hi")
+        assert other["message"] == "Hello! How can I help?"
+        assert len(llm.requests) == 3
+
+        # New clinic data invalidates both the replies and the FAQ contexts
+        faq_rag.content_hash = "v2"
+        llm.responses += [
+            openai_completion(tool_calls=[("answer_faq", {"question": question})]),
+            openai_completion("We now accept every plan.")
+        ]
+        third = await agent.chat(question)
+        assert third["message"] == "We now accept every plan."
+        assert len(llm.requests) == 5
+        assert faq_rag.lookups == [[question], [question]]
+    finally:
+        await agent.aclose()
+
+
+def test_history_split():
+    """Test the transcript is only cut before a plain patient message, keeping enough after it"""
+    def user(text):
+        return {"role": "user", "content": text}
+
+    def assistant(text):
+        return {"role": "assistant", "content": text}
+
+    tool_result = {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t", "content": "{}"}]}
+    messages = [
+        user("hi"), assistant("hello"),
+        user("any slots?"), assistant(""), tool_result, assistant("yes, 3 PM"),
+        user("book it"), assistant("done")
+    ]
+
+    assert _history_split(messages, keep=2) == 6
+    # Index 4 would leave 4 messages, but it is a tool result, not a patient message
+    assert _history_split(messages, keep=4) == 2
+    assert _history_split(messages, keep=6) == 2
+    assert _history_split(messages, keep=7) == 0
+    assert _history_split([assistant("hello")], keep=0) == 0
+
+
+@pytest.mark.asyncio
+async def test_summarize_history(monkeypatch):
+    """Test summaries use a tool-free request outside the LLM slots and only replace an unchanged prefix"""
+    monkeypatch.setenv("HISTORY_KEEP_MESSAGES", "2")
+    transcript = [
+        {"role": "user", "content": "I need a checkup"},
+        {"role": "assistant", "content": "Sure, when?"},
+        {"role": "user", "content": "Friday morning"},
+        {"role": "assistant", "content": "Friday at 9 AM is open"}
+    ]
+
+    def edit_prefix(request):
+        # Another writer trims the transcript while the summary is in flight
+        conversation.llm_messages[0] = {"role": "user", "content": "I need a follow-up"}
+        return openai_completion("Stale summary")
+
+    llm = ScriptedLLM(openai_completion("Patient wants a checkup."), edit_prefix)
+    agent = make_agent(llm, faq_rag=FakeFAQ())
+    # Patient turns would be turned away; summaries must not need a slot
+    agent._llm_max_waiters = 0
+    try:
+        conversation = ConversationState(conversation_id="c1", phase="greeting", messages=[])
+        conversation.llm_messages = list(transcript)
+        await agent.conversation_store.put("c1", conversation)
+
+        await agent._summarize_history("c1")
+        request = llm.requests[-1]
+        assert "tools" not in request
+        assert request["messages"][0] == {"role": "system", "content": HISTORY_SUMMARY_SYSTEM_PROMPT}
+        assert "I need a checkup" in request["messages"][1]["content"]
+        assert conversation.summary == "Patient wants a checkup."
+        assert conversation.llm_messages == transcript[2:]
+
+        conversation.llm_messages = list(transcript)
+        await agent._summarize_history("c1")
+        assert conversation.summary == "Patient wants a checkup."
+        assert len(conversation.llm_messages) == len(transcript)
+    finally:
+        await agent.aclose()
+
+
+def _stream_events(response):
+    """Decode the data payloads of a server-sent events response"""
+    return [
+        json.loads(event[len("data: "):])
+        for event in response.text.split("\n\n")
+        if event.startswith("data: ")
     ]
 
-    print("\nConversation simulation:")
-    for i, message in enumerate(conversation_steps, 1):
-        print(f"\n{i}. Patient: {message}")
-        print(f"   Agent: [Would respond based on conversation state]")
 
-    print("\n" + "="*50)
+def test_chat_stream_endpoint():
+    """Test POST /chat/stream sends delta events, then a done event with the full reply"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.agent.prompts import SYSTEM_BUSY_MESSAGE
+    from backend.api import chat
+
+    question = "Do you take walk-ins?"
+    llm = ScriptedLLM(
+        openai_stream(tool_calls=[("answer_faq", {"question": question})]),
+        openai_stream("Yes, ", "walk-ins are welcome.")
+    )
+    agent = make_agent(llm, faq_rag=FakeFAQ())
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api")
+    chat.set_agent(agent)
+    try:
+        with TestClient(app) as client:
+            response = client.post("/api/chat/stream", json={"message": question})
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = _stream_events(response)
+            assert events[:-1] == [
+                {"type": "delta", "content": "Yes, "},
+                {"type": "delta", "content": "walk-ins are welcome."}
+            ]
+            done = events[-1]
+            assert done["type"] == "done"
+            assert done["message"] == "Yes, walk-ins are welcome."
+            assert done["metadata"]["phase"] == "faq"
+            # The follow-up call after the tool round must answer in text
+            assert llm.requests[1]["tool_choice"] == "none"
+
+            # At capacity the turn is turned away with a single done event, without calling the LLM
+            agent._llm_max_waiters = 0
+            busy = _stream_events(client.post(
+                "/api/chat/stream",
+                json={"message": "Another question", "conversation_id": done["conversation_id"]}
+            ))
+            assert len(busy) == 1
+            assert busy[0]["type"] == "done"
+            assert busy[0]["message"] == SYSTEM_BUSY_MESSAGE
+            assert busy[0]["metadata"]["busy"] is True
+            assert busy[0]["metadata"]["message_count"] == 2
+            assert len(llm.requests) == 2
+    finally:
+        chat.set_agent(None)
+        asyncio.run(agent.aclose())
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_anthropic():
+    """Test stream_chat yields each Anthropic text delta, then done with the joined reply"""
+    llm = ScriptedLLM(anthropic_stream("Hello", "! How can I help?"))
+    agent = make_agent(llm, provider="anthropic", faq_rag=FakeFAQ())
+    try:
+        events = [event async for event in agent.stream_chat("Hi")]
+        assert events[:-1] == [
+            {"type": "delta", "content": "Hello"},
+            {"type": "delta", "content": "! How can I help?"}
+        ]
+        assert events[-1]["type"] == "done"
+        assert events[-1]["message"] == "Hello! How can I help?"
+        assert events[-1]["metadata"] == {"phase": "greeting", "message_count": 2}
+
+        # The done event's conversation continues with the same transcript
+        conversation = await agent.conversation_store.get(events[-1]["conversation_id"])
+        assert conversation.llm_messages[-1] == {"role": "assistant", "content": "Hello! How can I help?"}
+    finally:
+        await agent.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_text_before_tool_call():
+    """Test text streamed alongside a tool call is kept in the done event and the transcript"""
+    question = "Do you take walk-ins?"
+    llm = ScriptedLLM(
+        openai_stream("Let me check. ", tool_calls=[("answer_faq", {"question": question})], merge=True),
+        openai_stream("Yes, walk-ins are welcome.")
+    )
+    agent = make_agent(llm, faq_rag=FakeFAQ())
+    try:
+        events = [event async for event in agent.stream_chat(question)]
+        assert events[:-1] == [
+            {"type": "delta", "content": "Let me check. "},
+            {"type": "delta", "content": "Yes, walk-ins are welcome."}
+        ]
+        assert events[-1]["message"] == "Let me check. Yes, walk-ins are welcome."
+
+        conversation = await agent.conversation_store.get(events[-1]["conversation_id"])
+        assert conversation.messages[-1].content == "Let me check. Yes, walk-ins are welcome."
+        # The LLM transcript has the first-pass text on the tool turn only
+        tool_turn = next(message for message in conversation.llm_messages if message.get("tool_calls"))
+        assert tool_turn["content"] == "Let me check. "
+        assert conversation.llm_messages[-1] == {"role": "assistant", "content": "Yes, walk-ins are welcome."}
+    finally:
+        await agent.aclose()
+
+
+class FakeOpenAIBatchClient:
+    """AsyncOpenAI stand-in for the Files and Batch APIs, answering each request with its own message"""
+
+    def __init__(self, final_status="completed", failing_ids=()):
+        self.final_status = final_status
+        self.failing_ids = set(failing_ids)
+        self.uploaded = []
+        self.files = SimpleNamespace(create=self._upload, content=self._download)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    async def _upload(self, file, purpose):
+        self.uploaded = [json.loads(line) for line in file[1].splitlines()]
+        return SimpleNamespace(id="file-input")
+
+    async def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch_1", status="in_progress", output_file_id=None)
+
+    async def _retrieve_batch(self, batch_id):
+        return SimpleNamespace(id=batch_id, status=self.final_status, output_file_id="file-output")
+
+    async def _download(self, file_id):
+        # Output lines come back in a different order than they were submitted
+        lines = []
+        for item in reversed(self.uploaded):
+            if item["custom_id"] in self.failing_ids:
+                response = {"status_code": 500, "body": {"error": "server error"}}
+            else:
+                reply = "Re: " + item["body"]["messages"][-1]["content"]
+                response = {"status_code": 200, "body": openai_completion(reply)}
+            lines.append(json.dumps({"custom_id": item["custom_id"], "response": response, "error": None}))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+class FakeAnthropicBatchClient:
+    """AsyncAnthropic stand-in for the Message Batches API, answering each request with its own message"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.submitted = []
+        self.messages = SimpleNamespace(batches=SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve_batch, results=self._results
+        ))
+
+    async def _create_batch(self, requests):
+        if self.fail:
+            raise RuntimeError("batch rejected")
+        self.submitted = requests
+        return SimpleNamespace(id="msgbatch_1", processing_status="in_progress")
+
+    async def _retrieve_batch(self, batch_id):
+        return SimpleNamespace(id=batch_id, processing_status="ended")
+
+    async def _results(self, batch_id):
+        async def entries():
+            for item in reversed(self.submitted):
+                reply = "Re: " + item["params"]["messages"][-1]["content"]
+                yield SimpleNamespace(
+                    custom_id=item["custom_id"],
+                    result=SimpleNamespace(type="succeeded", message=reply)
+                )
+        return entries()
+
+
+def _batch_requests(count):
+    return [{"model": "test-model", "messages": [{"role": "user", "content": f"question {idx}"}]} for idx in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_batch_executor_openai():
+    """Test OpenAI batch results are matched to their requests by custom_id, and a failed job rejects all"""
+    client = FakeOpenAIBatchClient(failing_ids={"1"})
+    executor = BatchLLMExecutor(client, "openai", max_batch=3, poll_interval=0)
+
+    results = await asyncio.gather(*[executor.create(request) for request in _batch_requests(3)], return_exceptions=True)
+    assert len(client.uploaded) == 3
+    assert results[0].choices[0].message.content == "Re: question 0"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2].choices[0].message.content == "Re: question 2"
+
+    executor = BatchLLMExecutor(FakeOpenAIBatchClient(final_status="expired"), "openai", max_wait_ms=1, poll_interval=0)
+    results = await asyncio.gather(*[executor.create(request) for request in _batch_requests(2)], return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) and "expired" in str(result) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_executor_anthropic():
+    """Test Anthropic batch results are matched to their requests by custom_id, and a failed job rejects all"""
+    client = FakeAnthropicBatchClient()
+    executor = BatchLLMExecutor(client, "anthropic", max_wait_ms=1, poll_interval=0)
+
+    results = await asyncio.gather(*[executor.create(request) for request in _batch_requests(3)])
+    assert [request["custom_id"] for request in client.submitted] == ["0", "1", "2"]
+    assert results == ["Re: question 0", "Re: question 1", "Re: question 2"]
+
+    executor = BatchLLMExecutor(FakeAnthropicBatchClient(fail=True), "anthropic", max_wait_ms=1, poll_interval=0)
+    results = await asyncio.gather(*[executor.create(request) for request in _batch_requests(2)], return_exceptions=True)
+    assert [str(result) for result in results] == ["batch rejected", "batch rejected"]
+
+
+def _slot_turn(*calls, content=""):
+    """Parsed LLM response calling each (name, arguments) tool"""
+    return {
+        "content": content,
+        "tool_calls": [
+            {"id": f"call_{idx}", "name": name, "arguments": arguments}
+            for idx, (name, arguments) in enumerate(calls)
+        ]
+    }
+
+
+def test_render_slot_reply():
+    """Test slot lookups are rendered locally only when the model had nothing else to say"""
+    suggest = ("suggest_slots", {"appointment_type": "consultation"})
+    check = ("check_availability", {"date": "2024-12-10", "appointment_type": "followup"})
+    one_slot = {"success": True, "data": [
+        {"date": "2024-12-10", "day_name": "Tuesday", "start_time": "14:30", "end_time": "15:00"}
+    ]}
+    day_slots = {"success": True, "data": {
+        "date": "2024-12-10",
+        "available_slots": [{"start_time": f"{hour:02d}:00", "end_time": f"{hour:02d}:15"} for hour in range(8, 16)]
+    }}
+
+    # Cases that need the LLM to phrase the reply
+    assert _render_slot_reply(_slot_turn(suggest, content="Here you go"), [one_slot]) is None
+    assert _render_slot_reply(_slot_turn(suggest, ("answer_faq", {"question": "parking?"})), [one_slot, one_slot]) is None
+    assert _render_slot_reply(_slot_turn(suggest), [{"success": False, "error": "boom"}]) is None
+    assert _render_slot_reply(_slot_turn(suggest), [{"success": True, "data": []}]) is None
+    assert _render_slot_reply(
+        _slot_turn(check), [{"success": True, "data": {"date": "2024-12-10", "available_slots": []}}]
+    ) is None
+    assert _render_slot_reply(
+        _slot_turn(check, suggest),
+        [{"success": True, "data": {"date": "2024-12-10", "available_slots": []}}, one_slot]
+    ) is None
+
+    single = _render_slot_reply(_slot_turn(suggest), [one_slot])
+    assert single.startswith("Here are some available general consultation times:")
+    assert "- Tuesday, December 10 at 2:30 PM" in single
+    assert single.count("\n- ") == 1
+
+    # At most five slots per checked day; calls are listed in order
+    several = _render_slot_reply(_slot_turn(check, suggest), [day_slots, one_slot])
+    lines = [line for line in several.splitlines() if line.startswith("- ")]
+    assert several.startswith("Here are some available follow-up times:")
+    assert lines == [
+        "- Tuesday, December 10 at 8:00 AM",
+        "- Tuesday, December 10 at 9:00 AM",
+        "- Tuesday, December 10 at 10:00 AM",
+        "- Tuesday, December 10 at 11:00 AM",
+        "- Tuesday, December 10 at 12:00 PM",
+        "- Tuesday, December 10 at 2:30 PM"
+    ]
+
+
+# Example conversation flow, one test case per patient message
+_CONVERSATION_STEPS = (
+    "I need to see the doctor",
+    "I've been having headaches",
+    "Afternoon would be good, sometime this week",
+    "Wednesday at 3:30 PM works for me",
+    "John Doe",
+    "john.doe@email.com",
+    "+1-555-0123"
+)
+
+
+@pytest.mark.parametrize("i,message", list(enumerate(_CONVERSATION_STEPS, 1)))
+def test_example_conversation(i, message):
+    """Test an example conversation flow"""
+    print(f"\n{i}. Patient: {message}")
+    print(f"   Agent: [Would respond based on conversation state]")
 
 
 if __name__ == "__main__":